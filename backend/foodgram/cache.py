@@ -0,0 +1,188 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class LRUCache:
+    """Ограниченный по размеру словарь с временем жизни записей."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+RECIPES_TAG = "recipes"
+INGREDIENTS_TAG = "ingredients"
+
+
+def recipe_tag(recipe_id):
+    return f"recipe:{recipe_id}"
+
+
+def user_tag(user_id):
+    return f"user:{user_id}"
+
+
+def ingredient_tag(ingredient_id):
+    return f"ingredient:{ingredient_id}"
+
+
+class ResponseCache:
+    """
+    Кэш данных ответов в кэше Django ``RESPONSE_CACHE["CACHE"]`` с тегами.
+
+    У каждого тега в кэше хранится случайная версия, запись помнит версии
+    своих тегов на момент сохранения. Сброс тега меняет его версию, и все
+    записи с этим тегом перестают совпадать. Записи, сохранённые
+    параллельно со сбросом, живут не дольше ``TIMEOUT``.
+    """
+
+    key_prefix = "response:"
+    tag_prefix = "response-tag:"
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE["CACHE"]]
+
+    def make_key(self, request):
+        params = sorted(
+            (name, value)
+            for name in request.query_params
+            for value in request.query_params.getlist(name)
+        )
+        raw = json.dumps([request.get_host(), request.path, params])
+        return self.key_prefix + hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        data, versions = entry
+        if self.cache.get_many(list(versions)) != versions:
+            return None
+        return data
+
+    def set(self, key, data, tags):
+        tag_keys = {self.tag_prefix + tag for tag in tags}
+        versions = self.cache.get_many(tag_keys)
+        missing = {tag_key: uuid.uuid4().hex for tag_key in tag_keys - versions.keys()}
+        if missing:
+            self.cache.set_many(missing, None)
+            versions.update(missing)
+        self.cache.set(key, (data, versions), settings.RESPONSE_CACHE["TIMEOUT"])
+
+    def purge(self, *tags):
+        self.cache.set_many(
+            {self.tag_prefix + tag: uuid.uuid4().hex for tag in tags}, None
+        )
+
+
+response_cache = ResponseCache()
+
+
+def purge_responses(*tags):
+    transaction.on_commit(lambda: response_cache.purge(*tags))
+
+
+def cache_anonymous_response(get_tags):
+    """
+    Кэширует успешные ответы метода представления анонимным пользователям.
+    ``get_tags`` получает данные ответа и возвращает их теги.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not request.user.is_anonymous:
+                return method(self, request, *args, **kwargs)
+            key = response_cache.make_key(request)
+            data = response_cache.get(key)
+            if data is not None:
+                return Response(data)
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == HTTPStatus.OK:
+                response_cache.set(key, response.data, get_tags(response.data))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def make_etag(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def conditional_response(get_validators):
+    """
+    Отвечает 304 на If-None-Match/If-Modified-Since, не вызывая метод
+    представления. ``get_validators`` получает запрос и аргументы метода
+    и возвращает (etag, last_modified) или None, если объекта нет;
+    last_modified может быть None.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            validators = get_validators(request, *args, **kwargs)
+            if validators is None:
+                return method(self, request, *args, **kwargs)
+            etag, last_modified = validators
+            etag = quote_etag(etag)
+            timestamp = last_modified and int(last_modified.timestamp())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is not None:
+                return response
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == HTTPStatus.OK:
+                response.headers["ETag"] = etag
+                if timestamp:
+                    response.headers["Last-Modified"] = http_date(timestamp)
+            return response
+
+        return wrapper
+
+    return decorator
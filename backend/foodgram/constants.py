@@ -3,3 +3,25 @@ MAX_COOKING_TIME = 300
 
 MIN_INGREDIENT_AMOUNT = 1
 MAX_INGREDIENT_AMOUNT = 32000
+
+TIMELINE_FANOUT_THRESHOLD = 1000
+TIMELINE_BACKFILL_LIMIT = 100
+
+MEMBERSHIP_CACHE_SIZE = 10000
+MEMBERSHIP_CACHE_TTL = 3600
+
+SYNC_PAGE_SIZE = 500
+SYNC_SETTLE_SECONDS = 5
+SYNC_RETENTION_DAYS = 30
+
+IMAGE_VARIANT_WIDTHS = (160, 320, 640)
+IMAGE_VARIANT_QUALITY = 85
+
+MEDIA_GARBAGE_GRACE_HOURS = 24
+
+JOB_WORKERS = 2
+JOB_POLL_SECONDS = 1
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY_SECONDS = 10
+JOB_MAX_RETRY_DELAY_SECONDS = 3600
+JOB_LOCK_SECONDS = 600
@@ -0,0 +1,22 @@
+import django
+from django.db import connections
+
+
+def use_immediate_transactions():
+    """
+    SQLite: транзакции этого процесса сразу берут блокировку записи и ждут
+    её до ``timeout``. Без этого транзакция, которая сначала читает, а потом
+    пишет, падает с «database is locked», если параллельно пишет другой
+    процесс. Веб-серверу это не нужно, поэтому режим включает только
+    работник очереди.
+    """
+    for connection in connections.all():
+        if connection.vendor == "sqlite":
+            connection.close()
+            connection.settings_dict["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+
+
+def setup_worker():
+    """Инициализатор дочернего процесса работника."""
+    django.setup()
+    use_immediate_transactions()
@@ -0,0 +1,126 @@
+import mimetypes
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from foodgram.constants import IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WIDTHS
+from recipes.jobs import enqueue, task
+
+WEBP = "image/webp"
+
+
+def get_variant_name(name, width, extension):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "variants", f"{stem}_{width}.{extension}")
+
+
+def save_variant(image, name, width, image_format, extension):
+    height = round(image.height * width / image.width)
+    variant = image.resize((width, height), Image.LANCZOS)
+    if image_format in ("JPEG", "WEBP") and variant.mode not in ("RGB", "RGBA"):
+        variant = variant.convert("RGBA" if image_format == "WEBP" else "RGB")
+    buffer = BytesIO()
+    variant.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY)
+    return default_storage.save(
+        get_variant_name(name, width, extension), ContentFile(buffer.getvalue())
+    )
+
+
+def make_variants(name):
+    """
+    Уменьшенные копии изображения в исходном формате и WebP:
+    {"source": name, MIME-тип: {ширина: имя файла}}. Копии шире
+    оригинала не создаются.
+    """
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    original_type = Image.MIME.get(image.format)
+    formats = {WEBP: ("WEBP", "webp")}
+    if original_type and original_type != WEBP:
+        formats[original_type] = (
+            image.format,
+            mimetypes.guess_extension(original_type).lstrip("."),
+        )
+
+    variants = {"source": name}
+    for content_type, (image_format, extension) in formats.items():
+        variants[content_type] = {
+            str(width): save_variant(image, name, width, image_format, extension)
+            for width in IMAGE_VARIANT_WIDTHS
+            if width < image.width
+        }
+    return variants
+
+
+def is_variants_update(update_fields, variants_field):
+    """Сохранение только готовых копий изображения из build_variants."""
+    return update_fields is not None and set(update_fields) <= {
+        variants_field,
+        "updated_at",
+    }
+
+
+@task
+def build_variants(model, pk, field_name, variants_field):
+    """Строит копии текущего изображения объекта, если их ещё нет."""
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    name = getattr(instance, field_name).name
+    if not name or getattr(instance, variants_field).get("source") == name:
+        return
+    setattr(instance, variants_field, make_variants(name))
+    instance.save(update_fields=[variants_field, "updated_at"])
+
+
+def schedule_variants(instance, field_name, variants_field):
+    """
+    Ставит построение копий изображения в очередь задач, если изображение
+    изменилось. До готовности копий сериализаторы отдают оригинал.
+    """
+    name = getattr(instance, field_name).name
+    if not name or getattr(instance, variants_field).get("source") == name:
+        return
+    model = instance._meta.label
+    enqueue(
+        build_variants,
+        key=f"variants:{model}:{instance.pk}",
+        model=model,
+        pk=instance.pk,
+        field_name=field_name,
+        variants_field=variants_field,
+    )
+
+
+def get_srcset(image, variants, request=None):
+    """
+    Карта {MIME-тип: srcset}. Пока копии не готовы или если изображение
+    меньше всех ширин, в ней только оригинал без дескриптора ширины.
+    """
+    if not image:
+        return {}
+
+    def build_url(url):
+        return request.build_absolute_uri(url) if request is not None else url
+
+    srcset = {}
+    if variants.get("source") == image.name:
+        srcset = {
+            content_type: ", ".join(
+                f"{build_url(default_storage.url(name))} {width}w"
+                for width, name in widths.items()
+            )
+            for content_type, widths in variants.items()
+            if content_type != "source" and widths
+        }
+    if not srcset:
+        content_type = mimetypes.guess_type(image.name)[0]
+        if content_type:
+            srcset[content_type] = build_url(image.url)
+    return srcset
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def get_setting(name, default=None):
+    return getattr(settings, "REQUEST_STATS", {}).get(name, default)
+
+
+def get_view_name(request):
+    """Имя вида: ``RecipeListCreateView``, ``UserViewSet.subscriptions``."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view_class = getattr(match.func, "cls", None) or getattr(
+        match.func, "view_class", None
+    )
+    if view_class is None:
+        return match.view_name or match._func_path
+    actions = getattr(match.func, "actions", None)
+    if actions:
+        method = request.method.lower()
+        return f"{view_class.__name__}.{actions.get(method, method)}"
+    return view_class.__name__
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class RequestStats:
+    """Сводка по видам в памяти процесса."""
+
+    fields = ("queries", "db_time", "render_time", "total_time", "size")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view, **values):
+        with self._lock:
+            entry = self._views.setdefault(
+                view, {"requests": 0, "max_queries": 0, **dict.fromkeys(self.fields, 0)}
+            )
+            entry["requests"] += 1
+            entry["max_queries"] = max(entry["max_queries"], values["queries"])
+            for field in self.fields:
+                entry[field] += values[field]
+
+    def snapshot(self):
+        """Средние значения по каждому виду; время в миллисекундах."""
+        with self._lock:
+            views = {view: dict(entry) for view, entry in self._views.items()}
+        return {
+            view: {
+                "requests": entry["requests"],
+                "max_queries": entry["max_queries"],
+                **{
+                    field: round(
+                        entry[field]
+                        * (1000 if field.endswith("_time") else 1)
+                        / entry["requests"],
+                        2,
+                    )
+                    for field in self.fields
+                },
+            }
+            for view, entry in views.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+request_stats = RequestStats()
+
+
+class RequestStatsMiddleware:
+    """
+    Считает для каждого запроса SQL-запросы, время в БД, время рендеринга
+    ответа и его размер, копит их в ``request_stats`` по имени вида и
+    предупреждает в логе, если вид превысил бюджет запросов из
+    ``REQUEST_STATS["QUERY_BUDGETS"]`` (ключ ``"POST RecipeListCreateView"``
+    важнее ключа без метода). Должен стоять первым в MIDDLEWARE.
+
+    ``render`` — только перевод готовых данных в JSON рендерером. Работа
+    сериализаторов DRF идёт внутри вида: её запросы входят в ``db``, а время
+    — в ``total``. Сводка доступна администраторам в /api/stats/requests/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        recorder = QueryRecorder()
+        request._render_time = 0.0
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_time = time.perf_counter() - start
+
+        view = get_view_name(request)
+        if view is None:
+            return response
+        size = 0 if response.streaming else len(response.content)
+        request_stats.add(
+            view,
+            queries=recorder.count,
+            db_time=recorder.duration,
+            render_time=request._render_time,
+            total_time=total_time,
+            size=size,
+        )
+        self.check_budget(view, request, recorder.count)
+        if get_setting("SERVER_TIMING", settings.DEBUG):
+            response["Server-Timing"] = (
+                f"db;dur={recorder.duration * 1000:.1f};"
+                f'desc="{recorder.count} queries", '
+                f"render;dur={request._render_time * 1000:.1f}, "
+                f"total;dur={total_time * 1000:.1f}"
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def record_render_time(response):
+            request._render_time += time.perf_counter() - start
+
+        response.add_post_render_callback(record_render_time)
+        return response
+
+    def check_budget(self, view, request, queries):
+        budgets = get_setting("QUERY_BUDGETS", {})
+        budget = budgets.get(f"{request.method} {view}", budgets.get(view))
+        if budget is not None and queries > budget:
+            logger.warning(
+                f"{view}: {queries} SQL-запросов при бюджете {budget} "
+                f"({request.method} {request.get_full_path()})"
+            )
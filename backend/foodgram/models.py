@@ -0,0 +1,21 @@
+class CounterFieldsMixin:
+    """
+    Поля ``counter_fields`` меняются только через F() в сигналах. Обычный
+    save() уже сохранённого объекта записывает все поля, кроме них:
+    иначе значения из загруженного ранее объекта затрут чужие приращения.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not self._state.adding
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,188 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (keyset/cursor) с откатом на обычную пагинацию.
+
+    Режим включается параметром ``cursor`` (пустое значение — первая
+    страница). Следующая страница выбирается условием по полям ``ordering``,
+    поэтому стоимость запроса не зависит от глубины и не требует COUNT(*).
+    Без параметра или с непустым параметром из ``fallback_query_params``
+    (например, поиском с собственным порядком) запрос обрабатывается
+    ``fallback_class``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    ordering = ("-id",)
+    # Тип значения курсора для каждого поля ordering.
+    ordering_types = (int,)
+    fallback_class = LimitOffsetPagination
+    fallback_query_params = ()
+    invalid_cursor_message = "Некорректный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.cursor_query_param not in request.query_params or any(
+            request.query_params.get(param) for param in self.fallback_query_params
+        ):
+            self.fallback = self.fallback_class()
+            self.display_page_controls = self.fallback.display_page_controls
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.fallback = None
+        self.limit = self.get_limit(request)
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+
+        results = list(queryset[: self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.page = results[: self.limit]
+        return self.page
+
+    def paginate_sources(self, sources, request):
+        """
+        Пагинация по нескольким querysets с общими полями ``ordering``:
+        из каждого берётся по странице, результаты сливаются. Строки
+        с одинаковым ключом считаются дублями.
+        """
+        self.request = request
+        self.fallback = None
+        self.limit = self.get_limit(request)
+        position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param, "")
+        )
+
+        rows = {}
+        for queryset in sources:
+            queryset = queryset.order_by(*self.ordering)
+            if position is not None:
+                queryset = queryset.filter(self.get_position_filter(position))
+            for row in queryset[: self.limit + 1]:
+                rows.setdefault(self.get_position(row), row)
+
+        descending = self.ordering[0].startswith("-")
+        results = [rows[key] for key in sorted(rows, reverse=descending)]
+        self.has_next = len(results) > self.limit
+        self.page = results[: self.limit]
+        return self.page
+
+    def get_position(self, row):
+        return tuple(getattr(row, name) for name in self.get_field_names())
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def to_html(self):
+        if self.fallback is not None:
+            return self.fallback.to_html()
+        return ""
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if limit <= 0:
+            return self.page_size
+        return min(limit, self.max_page_size)
+
+    def get_field_names(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_position_filter(self, position):
+        """Строит условие «строго после позиции» для составного ключа."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self.get_position(self.page[-1])
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position)
+        )
+        return replace_query_param(url, self.page_size_query_param, self.limit)
+
+    def encode_cursor(self, position):
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in position
+        ]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                self.parse_position_value(value, value_type)
+                for value, value_type in zip(position, self.ordering_types)
+            ]
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_position_value(self, value, value_type):
+        if value_type is datetime:
+            value = datetime.fromisoformat(value)
+            if value.tzinfo is None:
+                raise ValueError("Время курсора без часового пояса")
+            return value
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise TypeError("Ожидалось целое число")
+        if not -(2**63) <= value < 2**63:
+            raise ValueError("Число вне диапазона")
+        return value
+
+
+class RecipeKeysetPagination(KeysetPagination):
+    ordering = ("-pub_date", "-id")
+    ordering_types = (datetime, int)
+    # Результаты поиска упорядочены по релевантности.
+    fallback_query_params = ("search",)
+
+
+class TimelinePagination(KeysetPagination):
+    ordering = ("-pub_date", "-recipe_id")
+    ordering_types = (datetime, int)
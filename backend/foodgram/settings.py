@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "users.User"
 
 MIDDLEWARE = [
+    "foodgram.middleware.RequestStatsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,7 +55,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
@@ -62,8 +63,71 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
 }
 
+# Токены кэшируются в памяти процесса на LOCAL_TTL секунд: отозванный
+# в другом процессе токен принимается не дольше этого времени. Общий кэш
+# (например, Redis или Memcached) избавляет остальные процессы от
+# запроса к БД и хранит записи TTL секунд.
+TOKEN_AUTH_CACHE = {
+    "LOCAL_SIZE": int(os.getenv("TOKEN_AUTH_LOCAL_CACHE_SIZE", "10000")),
+    "LOCAL_TTL": int(os.getenv("TOKEN_AUTH_LOCAL_CACHE_TTL", "30")),
+    "SHARED_CACHE": os.getenv("TOKEN_AUTH_SHARED_CACHE") or None,
+    "TTL": int(os.getenv("TOKEN_AUTH_CACHE_TTL", "300")),
+}
+
+# Общий кэш для номеров версий множеств избранного и корзины; без него
+# номера хранятся в БД.
+MEMBERSHIP_SHARED_CACHE = os.getenv("MEMBERSHIP_SHARED_CACHE") or None
+
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR")
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": (
+            "django.core.cache.backends.filebased.FileBasedCache"
+            if RESPONSE_CACHE_DIR
+            else "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": RESPONSE_CACHE_DIR or "responses",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+RESPONSE_CACHE = {
+    "CACHE": "responses",
+    "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300")),
+}
+
+# Фоновые задачи ставятся в очередь в БД и выполняются работником
+# manage.py run_jobs: с повторами и без потерь при перезапуске.
+# JOBS_EAGER=True обходится без работника и выполняет задачи в пуле
+# потоков веб-сервера после фиксации транзакции, но без повторов,
+# а невыполненные задачи теряются вместе с процессом.
+JOBS_EAGER = os.getenv("JOBS_EAGER", "False").lower() in ("true", "1")
+
+REQUEST_STATS = {
+    "SERVER_TIMING": os.getenv("SERVER_TIMING", str(DEBUG)).lower() in ("true", "1"),
+    "QUERY_BUDGETS": {
+        "IngredientListView": 3,
+        "RecipeListCreateView": 8,
+        "POST RecipeListCreateView": 30,
+        "RecipeDetailView": 8,
+        "PATCH RecipeDetailView": 20,
+        "PUT RecipeDetailView": 20,
+        "DELETE RecipeDetailView": 30,
+        "TimelineView": 8,
+        "SyncView": 12,
+        "SubscriptionView": 6,
+        "UserViewSet.list": 6,
+        "UserViewSet.retrieve": 4,
+        "UserViewSet.subscriptions": 6,
+    },
+}
+
 ROOT_URLCONF = "foodgram.urls"
 
+TEST_RUNNER = "foodgram.test_runner.TestRunner"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -88,6 +152,7 @@ if USE_SQLITE:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {"timeout": 20},
         }
     }
 else:
@@ -135,4 +200,9 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+STORAGES = {
+    "default": {"BACKEND": "foodgram.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -0,0 +1,45 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, называющее файлы по SHA-256 содержимого в каталоге
+    ``prefix``: одинаковые данные хранятся один раз, а файл по имени
+    никогда не меняется.
+
+    delete() ничего не удаляет, потому что файл может использоваться
+    другими объектами. Файлы без ссылок удаляет команда
+    collect_media_garbage через purge().
+    """
+
+    prefix = "content"
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = f"{self.prefix}/{digest[:2]}/{digest}{extension}"
+        if self.exists(name):
+            # Свежая дата защищает файл от сборки мусора, пока новая
+            # ссылка на него не записана.
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+    def delete(self, name):
+        pass
+
+    def purge(self, name):
+        super().delete(name)
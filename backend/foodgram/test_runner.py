@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Запускает тесты с копией MEDIA_ROOT во временном каталоге: загрузка
+    тестовых данных и тесты не пишут файлы в рабочий каталог media.
+    Пароли хэшируются быстрым MD5.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.media_root = tempfile.mkdtemp()
+        shutil.copytree(settings.MEDIA_ROOT, self.media_root, dirs_exist_ok=True)
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        )
+        self.settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
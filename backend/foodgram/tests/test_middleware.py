@@ -0,0 +1,49 @@
+from django.test import TestCase, override_settings
+
+from foodgram.middleware import request_stats
+from recipes.tests.utils import create_recipe, create_user, get_client
+
+
+class RequestStatsTests(TestCase):
+    def setUp(self):
+        request_stats.reset()
+        self.admin = create_user(is_staff=True)
+
+    def test_stats_are_collected_per_view(self):
+        client = get_client()
+        client.get("/api/ingredients/", {"name": "со"})
+        client.get("/api/ingredients/", {"name": "са"})
+        stats = get_client(self.admin).get("/api/stats/requests/").data
+        ingredients = stats["IngredientListView"]
+        self.assertEqual(ingredients["requests"], 2)
+        self.assertGreater(ingredients["size"], 0)
+        self.assertGreaterEqual(ingredients["total_time"], ingredients["render_time"])
+
+    def test_stats_are_admin_only_and_can_be_reset(self):
+        self.assertEqual(
+            get_client(create_user()).get("/api/stats/requests/").status_code, 403
+        )
+        get_client().get("/api/ingredients/")
+        client = get_client(self.admin)
+        self.assertEqual(client.delete("/api/stats/requests/").status_code, 204)
+        self.assertNotIn("IngredientListView", client.get("/api/stats/requests/").data)
+
+    @override_settings(REQUEST_STATS={"SERVER_TIMING": True})
+    def test_server_timing_header(self):
+        response = get_client().get("/api/ingredients/")
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+
+    def test_recipe_delete_fits_its_budget(self):
+        recipe = create_recipe()
+        with self.assertNoLogs("foodgram.middleware", "WARNING"):
+            response = get_client(recipe.author).delete(f"/api/recipes/{recipe.pk}/")
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(REQUEST_STATS={"QUERY_BUDGETS": {"IngredientListView": 0}})
+    def test_budget_overrun_is_logged(self):
+        with self.assertLogs("foodgram.middleware", "WARNING") as logs:
+            get_client().get("/api/ingredients/", {"name": "со"})
+        self.assertIn("IngredientListView", logs.output[0])
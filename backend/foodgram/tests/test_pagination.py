@@ -0,0 +1,74 @@
+import base64
+import json
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+from recipes.tests.utils import create_recipe, create_user, get_client
+from users.models import Subscription
+
+
+def make_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        for _ in range(5):
+            create_recipe()
+
+    def walk(self, url, **params):
+        ids, response = [], self.client.get(url, {"cursor": "", **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            if response.data["next"] is None:
+                return ids
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_pages_cover_feed_in_order(self):
+        expected = list(
+            Recipe.objects.order_by("-pub_date", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(self.walk("/api/recipes/", limit=2), expected)
+
+    def test_cursor_page_skips_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/recipes/", {"cursor": "", "limit": 2})
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    def test_offset_mode_is_default(self):
+        response = self.client.get("/api/recipes/", {"limit": 2})
+        self.assertEqual(response.data["count"], Recipe.objects.count())
+
+    def test_subscriptions_cursor(self):
+        authors = [create_user() for _ in range(3)]
+        subscriptions = [
+            Subscription.objects.create(subscriber=self.user, author=author)
+            for author in authors
+        ]
+        self.assertEqual(
+            self.walk("/api/users/subscriptions/", limit=2),
+            [subscription.author_id for subscription in reversed(subscriptions)],
+        )
+
+    def test_malformed_cursor_is_not_found(self):
+        for cursor in [
+            "не base64",
+            make_cursor([1]),
+            make_cursor({"id": 1}),
+            make_cursor(["2024-01-01T00:00:00", 1]),
+            make_cursor(["2024-01-01T00:00:00+00:00", True]),
+            make_cursor(["2024-01-01T00:00:00+00:00", 2**63]),
+            make_cursor([1, 1]),
+        ]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/recipes/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
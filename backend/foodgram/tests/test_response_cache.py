@@ -0,0 +1,61 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from foodgram.cache import response_cache
+from recipes.tests.utils import create_ingredient, create_recipe, get_client
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.ingredient = create_ingredient()
+        self.recipe = create_recipe(ingredients={self.ingredient: 1})
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+        self.client = get_client()
+
+    def get_name(self):
+        return self.client.get(self.url).data["name"]
+
+    def test_tag_purge_invalidates_entry(self):
+        response_cache.set("key", {"name": "старое"}, ["a", "b"])
+        self.assertEqual(response_cache.get("key"), {"name": "старое"})
+        response_cache.purge("c")
+        self.assertEqual(response_cache.get("key"), {"name": "старое"})
+        response_cache.purge("b")
+        self.assertIsNone(response_cache.get("key"))
+
+    def test_anonymous_list_is_served_from_cache(self):
+        first = self.client.get("/api/recipes/").data
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/recipes/").data, first)
+
+    def test_authenticated_responses_are_not_cached(self):
+        get_client(self.recipe.author).get("/api/recipes/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/recipes/")
+        self.assertTrue(queries)
+
+    def test_recipe_save_purges_detail_and_list(self):
+        self.get_name()
+        self.client.get("/api/recipes/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.name = "Новое название"
+            self.recipe.save()
+        self.assertEqual(self.get_name(), "Новое название")
+        names = [
+            item["name"] for item in self.client.get("/api/recipes/").data["results"]
+        ]
+        self.assertIn("Новое название", names)
+
+    def test_related_changes_purge_detail(self):
+        self.get_name()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.author.first_name = "Другое"
+            self.recipe.author.save()
+            self.ingredient.name = "переименованный"
+            self.ingredient.save()
+        data = self.client.get(self.url).data
+        self.assertEqual(data["author"]["first_name"], "Другое")
+        self.assertEqual(data["ingredients"][0]["name"], "переименованный")
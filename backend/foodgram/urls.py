@@ -21,10 +21,13 @@ from django.urls import path, include
 from django.contrib import admin
 from django.urls import path, include
 
+from .views import RequestStatsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("users.urls")),
     path("api/auth/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
     path("api/", include("recipes.urls")),
+    path("api/stats/requests/", RequestStatsView.as_view(), name="request-stats"),
 ]
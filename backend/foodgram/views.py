@@ -0,0 +1,20 @@
+from http import HTTPStatus
+
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .middleware import request_stats
+
+
+class RequestStatsView(APIView):
+    """Сводка RequestStatsMiddleware по видам этого процесса."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(request_stats.snapshot())
+
+    def delete(self, request):
+        request_stats.reset()
+        return Response(status=HTTPStatus.NO_CONTENT)
@@ -1,5 +1,9 @@
+from functools import partial
+
 from django.contrib import admin
+from .cart import diff_amounts, get_recipe_amounts
 from .models import Recipe, Ingredient, RecipeIngredient, Favorite, ShoppingList
+from .dispatch import recipe_ingredients_changed
 
 
 @admin.register(Ingredient)
@@ -15,17 +19,65 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author", "cooking_time", "pub_date")
+    list_display = ("name", "author", "cooking_time", "pub_date", "favorites_count")
     search_fields = ("name", "author__email", "author__username")
     list_filter = ("author",)
     inlines = [RecipeIngredientInline]
 
+    def save_related(self, request, form, formsets, change):
+        old_amounts = get_recipe_amounts(form.instance)
+        super().save_related(request, form, formsets, change)
+        old_amounts, new_amounts = diff_amounts(
+            old_amounts, get_recipe_amounts(form.instance)
+        )
+        if old_amounts or new_amounts:
+            recipe_ingredients_changed.send(
+                sender=Recipe,
+                recipe=form.instance,
+                old_amounts=old_amounts,
+                new_amounts=new_amounts,
+            )
+
 
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ("recipe", "component", "amount")
     search_fields = ("recipe__name", "component__name")
 
+    def change_recipes(self, recipe_ids, change):
+        """
+        Выполняет ``change`` и рассылает recipe_ingredients_changed для
+        затронутых рецептов, как при правке состава в RecipeAdmin.
+        """
+        recipes = list(Recipe.objects.filter(pk__in=recipe_ids))
+        old_amounts = {recipe.pk: get_recipe_amounts(recipe) for recipe in recipes}
+        change()
+        for recipe in recipes:
+            old, new = diff_amounts(old_amounts[recipe.pk], get_recipe_amounts(recipe))
+            if old or new:
+                recipe_ingredients_changed.send(
+                    sender=Recipe, recipe=recipe, old_amounts=old, new_amounts=new
+                )
+
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.add(form.initial["recipe"])
+        self.change_recipes(
+            recipe_ids, partial(super().save_model, request, obj, form, change)
+        )
+
+    def delete_model(self, request, obj):
+        self.change_recipes(
+            {obj.recipe_id}, partial(super().delete_model, request, obj)
+        )
+
+    def delete_queryset(self, request, queryset):
+        self.change_recipes(
+            set(queryset.values_list("recipe_id", flat=True)),
+            partial(super().delete_queryset, request, queryset),
+        )
+
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
@@ -0,0 +1,148 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import RecipeIngredient, ShoppingCartTotal, ShoppingList, lock_recipe
+
+
+def get_recipe_amounts(recipe):
+    return Counter(
+        dict(recipe.recipe_ingredients.values_list("component_id", "amount"))
+    )
+
+
+def diff_amounts(old_amounts, new_amounts):
+    """Оставляет в обоих словарях только ингредиенты, количество которых изменилось."""
+    changed = {
+        ingredient_id
+        for ingredient_id in old_amounts.keys() | new_amounts.keys()
+        if old_amounts.get(ingredient_id) != new_amounts.get(ingredient_id)
+    }
+    return (
+        {key: value for key, value in old_amounts.items() if key in changed},
+        {key: value for key, value in new_amounts.items() if key in changed},
+    )
+
+
+def apply_deltas(user_ids, deltas):
+    """
+    Прибавляет изменения количества ингредиентов к итогам корзины
+    указанных пользователей. Нулевые и отрицательные итоги удаляются.
+    Строки меняются в порядке id ингредиентов, чтобы параллельные
+    транзакции не блокировали друг друга взаимно.
+    """
+    user_ids = list(user_ids)
+    deltas = {
+        ingredient_id: delta for ingredient_id, delta in sorted(deltas.items()) if delta
+    }
+    if not user_ids or not deltas:
+        return
+
+    with transaction.atomic():
+        # Недостающие строки создаются с нулём и сразу увеличиваются:
+        # параллельная вставка той же строки не приводит к ошибке.
+        ShoppingCartTotal.objects.bulk_create(
+            [
+                ShoppingCartTotal(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for ingredient_id, delta in deltas.items()
+                if delta > 0
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True,
+        )
+        totals = ShoppingCartTotal.objects.filter(user_id__in=user_ids)
+        for ingredient_id, delta in deltas.items():
+            totals.filter(ingredient_id=ingredient_id).update(
+                amount=F("amount") + delta
+            )
+        totals.filter(amount__lte=0).delete()
+
+
+def change_cart_item_in_totals(cart_item, sign):
+    """Добавляет (sign=1) или убирает (sign=-1) рецепт из итогов корзины."""
+    amounts = dict(
+        RecipeIngredient.objects.filter(recipe_id=cart_item.recipe_id).values_list(
+            "component_id", "amount"
+        )
+    )
+    apply_deltas(
+        [cart_item.user_id],
+        {ingredient_id: sign * amount for ingredient_id, amount in amounts.items()},
+    )
+
+
+def update_recipe_in_totals(recipe, old_amounts, new_amounts):
+    """
+    Переносит изменение состава рецепта в корзины, где он лежит. Вызывается
+    в транзакции, изменившей состав: блокировка рецепта упорядочивает её
+    с добавлением и удалением рецепта из корзин (см. ShoppingList.save),
+    и корзина, добавленная параллельно, не теряет изменение.
+
+    Изменения состава в обход recipe_ingredients_changed (bulk_update,
+    update() из консоли, правка БД вручную) итоги не видят: их находит
+    и исправляет команда rebuild_cart_totals (--check только проверяет).
+    """
+    deltas = Counter(new_amounts)
+    deltas.subtract(old_amounts)
+    with transaction.atomic():
+        lock_recipe(recipe.pk)
+        user_ids = ShoppingList.objects.filter(recipe=recipe).values_list(
+            "user_id", flat=True
+        )
+        apply_deltas(user_ids, deltas)
+
+
+def aggregate_cart(user_ids=None):
+    """Итоги корзины, посчитанные заново по ShoppingList и RecipeIngredient."""
+    if user_ids is None:
+        rows = RecipeIngredient.objects.filter(recipe__in_carts__isnull=False)
+    else:
+        rows = RecipeIngredient.objects.filter(recipe__in_carts__user_id__in=user_ids)
+    rows = (
+        rows.values(user_id=F("recipe__in_carts__user"), ingredient_id=F("component"))
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    return {(row["user_id"], row["ingredient_id"]): row["total"] for row in rows}
+
+
+def get_materialized_cart(user_ids=None):
+    totals = ShoppingCartTotal.objects.all()
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in totals.values_list(
+            "user_id", "ingredient_id", "amount"
+        )
+    }
+
+
+def find_cart_mismatches(user_ids=None):
+    """Возвращает ключи (user_id, ingredient_id), где итоги расходятся."""
+    expected = aggregate_cart(user_ids)
+    actual = get_materialized_cart(user_ids)
+    return {
+        key: (actual.get(key), expected.get(key))
+        for key in expected.keys() | actual.keys()
+        if actual.get(key) != expected.get(key)
+    }
+
+
+def rebuild_cart_totals(user_ids=None):
+    with transaction.atomic():
+        totals = ShoppingCartTotal.objects.all()
+        if user_ids is not None:
+            totals = totals.filter(user_id__in=user_ids)
+        totals.delete()
+        return len(
+            ShoppingCartTotal.objects.bulk_create(
+                ShoppingCartTotal(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=amount
+                )
+                for (user_id, ingredient_id), amount in aggregate_cart(user_ids).items()
+            )
+        )
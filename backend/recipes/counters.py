@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Subscription
+from .models import Favorite, Recipe, ShoppingList
+
+User = get_user_model()
+
+
+def get_counters():
+    """Счётчики как (модель, поле, модель строк, поле связи со счётчиком)."""
+    return [
+        (User, "recipes_count", Recipe, "author"),
+        (User, "subscribers_count", Subscription, "author"),
+        (Recipe, "favorites_count", Favorite, "recipe"),
+        (Recipe, "in_carts_count", ShoppingList, "recipe"),
+    ]
+
+
+def count_expression(source, relation):
+    counts = (
+        source.objects.filter(**{relation: OuterRef("pk")})
+        .order_by()
+        .values(relation)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def change_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def find_counter_drift():
+    """Возвращает (модель, pk, поле, сохранено, фактически) для расхождений."""
+    drift = []
+    for model, field, source, relation in get_counters():
+        rows = (
+            model.objects.annotate(actual=count_expression(source, relation))
+            .exclude(**{field: F("actual")})
+            .values_list("pk", field, "actual")
+        )
+        drift.extend((model, pk, field, stored, actual) for pk, stored, actual in rows)
+    return drift
+
+
+def reconcile_counters():
+    """Пересчитывает счётчики с расхождениями, возвращает число строк."""
+    updated = 0
+    for model, field, source, relation in get_counters():
+        expression = count_expression(source, relation)
+        stale = model.objects.annotate(actual=expression).exclude(
+            **{field: F("actual")}
+        )
+        updated += model.objects.filter(pk__in=stale.values("pk")).update(
+            **{field: expression}
+        )
+    return updated
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Отправляется после записи состава рецепта с аргументами recipe,
+# old_amounts и new_amounts ({id ингредиента: количество}) только
+# по изменившимся ингредиентам: нет в old_amounts — ингредиент добавлен,
+# нет в new_amounts — удалён.
+recipe_ingredients_changed = Signal()
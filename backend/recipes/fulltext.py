@@ -0,0 +1,123 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+SQLITE_TABLE = "recipes_recipe_fts"
+POSTGRES_TABLE = "recipes_recipe_search"
+POSTGRES_CONFIG = "russian"
+NAME_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+
+WORD_RE = re.compile(r"\w+")
+
+
+class SQLiteFullTextBackend:
+    """Индекс FTS5: название и описание рецепта, rowid совпадает с id."""
+
+    def update(self, cursor, recipe):
+        self.delete(cursor, recipe.pk)
+        cursor.execute(
+            f"INSERT INTO {SQLITE_TABLE}(rowid, name, text) VALUES (%s, %s, %s)",
+            [recipe.pk, recipe.name, recipe.text],
+        )
+
+    def delete(self, cursor, recipe_id):
+        cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [recipe_id])
+
+    def build_query(self, text):
+        words = WORD_RE.findall(text)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search(self, queryset, text):
+        query = self.build_query(text)
+        if not query:
+            return queryset.none()
+        matches = RawSQL(
+            f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s",
+            [query],
+        )
+        # bm25() тем меньше, чем лучше совпадение, поэтому меняем знак.
+        rank = RawSQL(
+            f"SELECT -bm25({SQLITE_TABLE}, %s, %s) FROM {SQLITE_TABLE} "
+            f"WHERE {SQLITE_TABLE} MATCH %s AND rowid = recipes_recipe.id",
+            [NAME_WEIGHT, TEXT_WEIGHT, query],
+        )
+        return (
+            queryset.filter(id__in=matches)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-pub_date")
+        )
+
+
+class PostgresFullTextBackend:
+    """Таблица tsvector с GIN-индексом, название весомее описания."""
+
+    document_sql = (
+        f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'A') || "
+        f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'B')"
+    )
+
+    def update(self, cursor, recipe):
+        cursor.execute(
+            f"INSERT INTO {POSTGRES_TABLE}(recipe_id, document) "
+            f"VALUES (%s, {self.document_sql}) "
+            "ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document",
+            [recipe.pk, recipe.name, recipe.text],
+        )
+
+    def delete(self, cursor, recipe_id):
+        cursor.execute(
+            f"DELETE FROM {POSTGRES_TABLE} WHERE recipe_id = %s", [recipe_id]
+        )
+
+    def search(self, queryset, text):
+        if not text.strip():
+            return queryset.none()
+        tsquery = f"websearch_to_tsquery('{POSTGRES_CONFIG}', %s)"
+        matches = RawSQL(
+            f"SELECT recipe_id FROM {POSTGRES_TABLE} WHERE document @@ {tsquery}",
+            [text],
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(document, {tsquery}) FROM {POSTGRES_TABLE} "
+            "WHERE recipe_id = recipes_recipe.id",
+            [text],
+        )
+        return (
+            queryset.filter(id__in=matches)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-pub_date")
+        )
+
+
+BACKENDS = {
+    "sqlite": SQLiteFullTextBackend(),
+    "postgresql": PostgresFullTextBackend(),
+}
+
+
+def get_backend(vendor=None):
+    return BACKENDS.get(vendor or connection.vendor)
+
+
+def index_recipe(recipe):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.update(cursor, recipe)
+
+
+def unindex_recipe(recipe_id):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.delete(cursor, recipe_id)
+
+
+def search_recipes(queryset, text):
+    """Оставляет рецепты, подходящие под запрос, по убыванию релевантности."""
+    backend = get_backend()
+    if backend is None:
+        return queryset.filter(name__icontains=text)
+    return backend.search(queryset, text)
@@ -0,0 +1,165 @@
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from foodgram.constants import (
+    JOB_LOCK_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_RETRY_DELAY_SECONDS,
+    JOB_RETRY_DELAY_SECONDS,
+    JOB_WORKERS,
+)
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def get_task_name(func):
+    return f"{func.__module__}.{func.__name__}"
+
+
+def task(func):
+    """
+    Разрешает ставить функцию в очередь. Аргументы должны сериализоваться
+    в JSON. Задача может выполниться повторно после сбоя, поэтому должна
+    быть идемпотентной и сама открывать нужные ей транзакции.
+    """
+    TASKS[get_task_name(func)] = func
+    return func
+
+
+def get_task(name):
+    if name not in TASKS:
+        import_string(name)
+    return TASKS[name]
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=JOB_WORKERS, thread_name_prefix="jobs"
+        )
+    return _executor
+
+
+def run_in_process(func, kwargs):
+    try:
+        func(**kwargs)
+    except Exception:
+        logger.exception(f"Задача {get_task_name(func)} завершилась с ошибкой")
+    finally:
+        connections.close_all()
+
+
+def enqueue(func, key=None, delay=0, max_attempts=JOB_MAX_ATTEMPTS, **kwargs):
+    """
+    Ставит задачу в очередь в текущей транзакции: задача появится,
+    только если транзакция зафиксирована. При ``JOBS_EAGER`` задача
+    после фиксации передаётся пулу потоков этого процесса, без повторов
+    и без ожидания в запросе.
+    """
+    name = get_task_name(func)
+    if name not in TASKS:
+        raise ValueError(f"{name} не зарегистрирована как задача")
+    if settings.JOBS_EAGER:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_process, func, kwargs)
+        )
+        return
+    Job.objects.bulk_create(
+        [
+            Job(
+                name=name,
+                payload=kwargs,
+                key=key,
+                max_attempts=max_attempts,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def get_available_jobs():
+    """Ожидающие задачи и задачи, взятые работником, который не ответил."""
+    now = timezone.now()
+    return Job.objects.filter(
+        Q(status=Job.Status.PENDING, run_at__lte=now)
+        | Q(
+            status=Job.Status.RUNNING,
+            locked_at__lt=now - timedelta(seconds=JOB_LOCK_SECONDS),
+        )
+    )
+
+
+def claim_jobs(limit):
+    """
+    Забирает до ``limit`` задач. Задача достаётся тому работнику, чей
+    условный UPDATE её изменил, поэтому работники могут работать
+    параллельно и без блокировок строк.
+    """
+    claimed = []
+    candidates = get_available_jobs().order_by("run_at").values_list("pk", flat=True)
+    for pk in candidates[:limit]:
+        if (
+            get_available_jobs()
+            .filter(pk=pk)
+            .update(
+                status=Job.Status.RUNNING,
+                locked_at=timezone.now(),
+                attempts=F("attempts") + 1,
+            )
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def get_retry_delay(attempts):
+    return min(
+        JOB_RETRY_DELAY_SECONDS * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY_SECONDS
+    )
+
+
+def fail_job(job, error):
+    jobs = Job.objects.filter(pk=job.pk)
+    if job.attempts >= job.max_attempts:
+        jobs.update(status=Job.Status.FAILED, last_error=error)
+        return
+    try:
+        with transaction.atomic():
+            jobs.update(
+                status=Job.Status.PENDING,
+                run_at=timezone.now()
+                + timedelta(seconds=get_retry_delay(job.attempts)),
+                last_error=error,
+            )
+    except IntegrityError:
+        # Та же работа уже поставлена заново и выполнится той задачей.
+        jobs.delete()
+
+
+def run_job(pk):
+    try:
+        job = Job.objects.get(pk=pk)
+        try:
+            get_task(job.name)(**job.payload)
+        except Exception:
+            logger.exception(f"Задача {job.name} ({pk}) завершилась с ошибкой")
+            fail_job(job, traceback.format_exc())
+        else:
+            Job.objects.filter(pk=pk).delete()
+    finally:
+        connections.close_all()
@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Prefetch, Value, Window
+from django.db.models.functions import RowNumber
+
+from foodgram.cache import LRUCache
+from foodgram.constants import MEMBERSHIP_CACHE_SIZE, MEMBERSHIP_CACHE_TTL
+from users.models import Subscription
+from .models import Favorite, Recipe, RecipeIngredient, ShoppingList
+from .search import bump_version, get_version
+
+FAVORITE = "favorite"
+SHOPPING_CART = "shopping_cart"
+SUBSCRIPTION = "subscription"
+
+MEMBERSHIP_MODELS = {Favorite: FAVORITE, ShoppingList: SHOPPING_CART}
+
+
+def with_feed_relations(queryset):
+    """
+    Подгружает автора и ингредиенты рецептов фиксированным числом запросов.
+    Ингредиенты идут в порядке добавления в рецепт.
+    """
+    ingredients = RecipeIngredient.objects.select_related("component").order_by("id")
+    return queryset.select_related("author").prefetch_related(
+        Prefetch("recipe_ingredients", queryset=ingredients)
+    )
+
+
+class UserMembership:
+    """
+    Множества id рецептов в избранном и корзине пользователей в памяти
+    процесса для флагов is_favorited и is_in_shopping_cart. Множества
+    пользователя загружаются одним запросом при первом обращении
+    и сверяются с номером версии в общем кэше ``MEMBERSHIP_SHARED_CACHE``
+    или, без него, в таблице DataVersion: изменение в одном процессе
+    увеличивает номер, остальные процессы перечитывают множества.
+    """
+
+    version_key = "recipes:membership-version:{}"
+
+    def __init__(self, max_size=MEMBERSHIP_CACHE_SIZE, ttl=MEMBERSHIP_CACHE_TTL):
+        self._entries = LRUCache(max_size, ttl)
+
+    @property
+    def cache(self):
+        alias = settings.MEMBERSHIP_SHARED_CACHE
+        return caches[alias] if alias else None
+
+    def get(self, user_id):
+        version = get_version(self.version_key.format(user_id), self.cache)
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        sets = self.load(user_id)
+        self._entries.set(user_id, (version, sets))
+        return sets
+
+    def load(self, user_id):
+        sets = {FAVORITE: set(), SHOPPING_CART: set()}
+        favorites = (
+            Favorite.objects.filter(user_id=user_id)
+            .annotate(kind=Value(FAVORITE))
+            .values_list("kind", "recipe_id")
+            .order_by()
+        )
+        cart = (
+            ShoppingList.objects.filter(user_id=user_id)
+            .annotate(kind=Value(SHOPPING_CART))
+            .values_list("kind", "recipe_id")
+            .order_by()
+        )
+        for kind, recipe_id in favorites.union(cart, all=True):
+            sets[kind].add(recipe_id)
+        return {kind: frozenset(ids) for kind, ids in sets.items()}
+
+    def apply(self, user_id, kind, recipe_id, added):
+        """
+        Обновляет множества пользователя без запроса к БД, если они
+        отстают ровно на одну версию; иначе сбрасывает их.
+        """
+        version = bump_version(self.version_key.format(user_id), self.cache)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        if entry[0] != version - 1:
+            self._entries.delete(user_id)
+            return
+        sets = dict(entry[1])
+        if added:
+            sets[kind] = sets[kind] | {recipe_id}
+        else:
+            sets[kind] = sets[kind] - {recipe_id}
+        self._entries.set(user_id, (version, sets))
+
+    def clear(self):
+        """Очищает множества этого процесса."""
+        self._entries.clear()
+
+
+user_membership = UserMembership()
+
+
+def update_user_membership(instance, added):
+    user_membership.apply(
+        instance.user_id,
+        MEMBERSHIP_MODELS[type(instance)],
+        instance.recipe_id,
+        added,
+    )
+
+
+def cache_related(instance, related_name, objects):
+    """Кладёт уже известные связанные объекты в кэш prefetch_related."""
+    queryset = getattr(instance, related_name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[related_name] = queryset
+
+
+def load_own_recipe_flags(user, created=False):
+    """
+    Флаги рецепта для его автора без запроса к БД: на себя подписаться
+    нельзя, а новый рецепт ещё не в избранном и не в корзине.
+    """
+    flags = {FAVORITE: set(), SHOPPING_CART: set(), SUBSCRIPTION: set()}
+    if not created:
+        flags.update(user_membership.get(user.id))
+    return flags
+
+
+def load_user_flags(user, recipes):
+    """
+    Возвращает множества id рецептов в избранном и корзине пользователя
+    из памяти и id авторов страницы, на которых он подписан.
+    """
+    flags = {FAVORITE: set(), SHOPPING_CART: set(), SUBSCRIPTION: set()}
+    if user is None or user.is_anonymous or not recipes:
+        return flags
+
+    flags.update(user_membership.get(user.id))
+    flags[SUBSCRIPTION] = set(
+        Subscription.objects.filter(
+            subscriber=user,
+            author_id__in={recipe.author_id for recipe in recipes},
+        ).values_list("author_id", flat=True)
+    )
+    return flags
+
+
+def load_subscription_flags(user, authors):
+    """Флаги подписки текущего пользователя на авторов страницы."""
+    flags = {FAVORITE: set(), SHOPPING_CART: set(), SUBSCRIPTION: set()}
+    if user is None or user.is_anonymous or not authors:
+        return flags
+    flags[SUBSCRIPTION] = set(
+        Subscription.objects.filter(
+            subscriber=user, author_id__in=[author.id for author in authors]
+        ).values_list("author_id", flat=True)
+    )
+    return flags
+
+
+def load_latest_recipes(authors, limit=None):
+    """
+    Последние ``limit`` рецептов каждого автора одним запросом
+    с ROW_NUMBER() по автору.
+    """
+    recipes = Recipe.objects.filter(author_id__in=[author.id for author in authors])
+    if limit is not None:
+        recipes = recipes.annotate(
+            position=Window(
+                RowNumber(), partition_by=F("author_id"), order_by=F("id").desc()
+            )
+        ).filter(position__lte=limit)
+
+    latest = defaultdict(list)
+    for recipe in recipes.order_by("author_id", "-id"):
+        latest[recipe.author_id].append(recipe)
+    return latest
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from foodgram.constants import MEDIA_GARBAGE_GRACE_HOURS
+from recipes.media import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Удаляет медиафайлы, на которые не ссылается ни один объект."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=MEDIA_GARBAGE_GRACE_HOURS,
+            help="Не трогать файлы, менявшиеся за последние часы.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только вывести файлы, ничего не удаляя.",
+        )
+
+    def handle(self, *args, grace_hours, dry_run=False, **options):
+        garbage = collect_garbage(timedelta(hours=grace_hours), dry_run)
+        for name in garbage:
+            self.stdout.write(name)
+        action = "Будет удалено" if dry_run else "Удалено"
+        self.stdout.write(self.style.SUCCESS(f"{action} файлов: {len(garbage)}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.constants import SYNC_RETENTION_DAYS
+from recipes.sync import prune_change_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет старые записи журнала изменений. Клиенты с более старым "
+        "токеном получат ответ 410 и синхронизируются заново."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=SYNC_RETENTION_DAYS,
+            help="Сколько дней хранить записи.",
+        )
+
+    def handle(self, *args, days, **options):
+        deleted = prune_change_log(days)
+        self.stdout.write(self.style.SUCCESS(f"Удалено записей: {deleted}"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.cart import find_cart_mismatches, rebuild_cart_totals
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает итоги корзин покупок или проверяет их согласованность."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="id пользователя (можно указать несколько раз).",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сравнить итоги с агрегирующим запросом.",
+        )
+
+    def handle(self, *args, user_ids=None, check=False, **options):
+        if check:
+            mismatches = find_cart_mismatches(user_ids)
+            for (user_id, ingredient_id), (actual, expected) in sorted(
+                mismatches.items()
+            ):
+                self.stdout.write(
+                    f"user={user_id} ingredient={ingredient_id}: "
+                    f"{actual} вместо {expected}"
+                )
+            if mismatches:
+                raise CommandError(f"Расхождений: {len(mismatches)}")
+            self.stdout.write(self.style.SUCCESS("Итоги корзин согласованы."))
+            return
+
+        created = rebuild_cart_totals(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Записано итогов: {created}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import NEIGHBOURS_LIMIT, rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает списки похожих рецептов по составу ингредиентов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=NEIGHBOURS_LIMIT,
+            help="Сколько соседей хранить для каждого рецепта.",
+        )
+
+    def handle(self, *args, limit, **options):
+        created = rebuild_similar_recipes(limit)
+        self.stdout.write(self.style.SUCCESS(f"Записано пар: {created}"))
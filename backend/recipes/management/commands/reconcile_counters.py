@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import find_counter_drift, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Сверяет счётчики рецептов, подписчиков, избранного и корзин."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только вывести расхождения, ничего не исправляя.",
+        )
+
+    def handle(self, *args, check=False, **options):
+        if check:
+            drift = find_counter_drift()
+            for model, pk, field, stored, actual in drift:
+                self.stdout.write(
+                    f"{model._meta.label} {pk}.{field}: {stored} вместо {actual}"
+                )
+            if drift:
+                raise CommandError(f"Расхождений: {len(drift)}")
+            self.stdout.write(self.style.SUCCESS("Счётчики согласованы."))
+            return
+
+        updated = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(f"Исправлено строк: {updated}"))
@@ -0,0 +1,79 @@
+import multiprocessing
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from django.core.management.base import BaseCommand
+
+from foodgram.constants import JOB_POLL_SECONDS, JOB_WORKERS
+from foodgram.db import setup_worker, use_immediate_transactions
+from recipes.jobs import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет фоновые задачи из очереди. Задачи, взятые остановленным "
+        "работником, снова становятся доступны через JOB_LOCK_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=JOB_WORKERS,
+            help="Сколько задач выполнять одновременно.",
+        )
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Выполнять задачи в пуле процессов вместо пула потоков.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=JOB_POLL_SECONDS,
+            help="Пауза в секундах, когда очередь пуста.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить доступные задачи и завершиться.",
+        )
+
+    def handle(
+        self, *args, workers, processes=False, poll_interval, once=False, **options
+    ):
+        use_immediate_transactions()
+        if processes:
+            # spawn: дочерние процессы не наследуют соединения с БД.
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=setup_worker,
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+
+        running = set()
+        try:
+            while True:
+                free = workers - len(running)
+                running.update(pool.submit(run_job, pk) for pk in claim_jobs(free))
+                if not running:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                done, running = wait(
+                    running, timeout=poll_interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    future.result()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
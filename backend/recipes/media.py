@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from foodgram.constants import MEDIA_GARBAGE_GRACE_HOURS
+from .models import MediaFile, Recipe
+
+User = get_user_model()
+
+# Модель: (поле изображения, поле с копиями изображения).
+MEDIA_FIELDS = {
+    Recipe: ("image", "image_variants"),
+    User: ("avatar", "avatar_variants"),
+}
+
+
+def get_file_names(image_name, variants):
+    names = {image_name} if image_name else set()
+    for content_type, widths in variants.items():
+        if content_type != "source":
+            names.update(widths.values())
+    return names
+
+
+def get_instance_files(instance):
+    field, variants_field = MEDIA_FIELDS[type(instance)]
+    return get_file_names(
+        getattr(instance, field).name, getattr(instance, variants_field)
+    )
+
+
+def change_references(added=(), removed=()):
+    now = timezone.now()
+    if added:
+        MediaFile.objects.bulk_create(
+            [MediaFile(name=name) for name in added], ignore_conflicts=True
+        )
+        MediaFile.objects.filter(name__in=added).update(
+            refcount=F("refcount") + 1, updated_at=now
+        )
+    if removed:
+        MediaFile.objects.filter(name__in=removed).update(
+            refcount=F("refcount") - 1, updated_at=now
+        )
+
+
+def remember_files(instance, update_fields=None):
+    """Запоминает файлы объекта до сохранения, если сохранение их касается."""
+    instance._media_files = None
+    fields = MEDIA_FIELDS[type(instance)]
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    if instance._state.adding:
+        instance._media_files = set()
+        return
+    row = type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._media_files = get_file_names(*row) if row else set()
+
+
+def update_references(instance):
+    before = getattr(instance, "_media_files", None)
+    if before is None:
+        return
+    after = get_instance_files(instance)
+    change_references(after - before, before - after)
+    instance._media_files = None
+
+
+def release_references(instance):
+    """Снимает ссылки удалённого объекта, запомненные перед удалением."""
+    files = getattr(instance, "_media_files", None)
+    if files is None:
+        files = get_instance_files(instance)
+    change_references(removed=files)
+
+
+def walk(directory):
+    if not default_storage.exists(directory):
+        return
+    directories, files = default_storage.listdir(directory)
+    for name in files:
+        yield f"{directory}/{name}"
+    for name in directories:
+        yield from walk(f"{directory}/{name}")
+
+
+def collect_garbage(grace=None, dry_run=False):
+    """
+    Удаляет файлы без ссылок, не менявшиеся дольше ``grace``: файлы
+    хранилища без записи MediaFile (загружены, но не сохранены в объекте)
+    и файлы с нулевым числом ссылок. Возвращает имена удалённых файлов.
+    """
+    if grace is None:
+        grace = timedelta(hours=MEDIA_GARBAGE_GRACE_HOURS)
+    boundary = timezone.now() - grace
+    referenced = set(
+        MediaFile.objects.filter(refcount__gt=0).values_list("name", flat=True)
+    )
+    released = MediaFile.objects.filter(refcount__lte=0, updated_at__lte=boundary)
+    garbage = set(released.values_list("name", flat=True))
+    for name in walk(default_storage.prefix):
+        if (
+            name not in referenced
+            and default_storage.get_modified_time(name) <= boundary
+        ):
+            garbage.add(name)
+
+    garbage = sorted(name for name in garbage if default_storage.exists(name))
+    if not dry_run:
+        for name in garbage:
+            if not MediaFile.objects.filter(name=name, refcount__gt=0).exists():
+                default_storage.purge(name)
+        released.delete()
+    return garbage
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# DDL записан здесь, а не берётся из recipes.fulltext: миграция должна
+# создавать ту схему, что была на момент её написания.
+FULLTEXT_SQL = {
+    "sqlite": (
+        [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts "
+            "USING fts5(name, text, tokenize='unicode61 remove_diacritics 2')",
+            "INSERT INTO recipes_recipe_fts(rowid, name, text) "
+            "SELECT id, name, text FROM recipes_recipe",
+        ],
+        ["DROP TABLE IF EXISTS recipes_recipe_fts"],
+    ),
+    "postgresql": (
+        [
+            "CREATE TABLE IF NOT EXISTS recipes_recipe_search ("
+            "recipe_id bigint PRIMARY KEY "
+            "REFERENCES recipes_recipe(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS recipes_recipe_search_document_idx "
+            "ON recipes_recipe_search USING GIN (document)",
+            "INSERT INTO recipes_recipe_search(recipe_id, document) "
+            "SELECT id, setweight(to_tsvector('russian', name), 'A') || "
+            "setweight(to_tsvector('russian', text), 'B') FROM recipes_recipe",
+        ],
+        ["DROP TABLE IF EXISTS recipes_recipe_search"],
+    ),
+}
+
+
+def run_fulltext_sql(position):
+    def run(apps, schema_editor):
+        statements = FULLTEXT_SQL.get(schema_editor.connection.vendor)
+        for sql in statements[position] if statements else ():
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_shoppingcarttotal"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_fulltext_sql(0), run_fulltext_sql(1)),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:43
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = [
+    ("users", "User", "recipes_count", "recipes", "Recipe", "author"),
+    ("users", "User", "subscribers_count", "users", "Subscription", "author"),
+    ("recipes", "Recipe", "favorites_count", "recipes", "Favorite", "recipe"),
+    ("recipes", "Recipe", "in_carts_count", "recipes", "ShoppingList", "recipe"),
+]
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, source_app, source, relation in COUNTERS:
+        counts = (
+            apps.get_model(source_app, source)
+            .objects.filter(**{relation: OuterRef("pk")})
+            .order_by()
+            .values(relation)
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        apps.get_model(app, model).objects.update(
+            **{field: Coalesce(Subquery(counts, output_field=IntegerField()), 0)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_similarrecipe"),
+        ("users", "0003_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="in_carts_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="В корзинах"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="id владельца"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("recipe", "Рецепт"),
+                            ("favorite", "Избранное"),
+                            ("shopping_cart", "Корзина"),
+                            ("subscription", "Подписка"),
+                        ],
+                        max_length=20,
+                        verbose_name="Тип объекта",
+                    ),
+                ),
+                ("object_id", models.BigIntegerField(verbose_name="id объекта")),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("upsert", "Создание или изменение"),
+                            ("delete", "Удаление"),
+                        ],
+                        max_length=10,
+                        verbose_name="Действие",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Дата"),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись журнала изменений",
+                "verbose_name_plural": "Журнал изменений",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(fields=["owner", "id"], name="changelog_owner_id_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:01
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+MEDIA_FIELDS = [
+    ("recipes", "Recipe", "image", "image_variants"),
+    ("users", "User", "avatar", "avatar_variants"),
+]
+
+
+def count_references(apps, schema_editor):
+    counts = Counter()
+    for app, model, field, variants_field in MEDIA_FIELDS:
+        rows = apps.get_model(app, model).objects.values_list(field, variants_field)
+        for name, variants in rows.iterator():
+            names = {name} if name else set()
+            for content_type, widths in variants.items():
+                if content_type != "source":
+                    names.update(widths.values())
+            counts.update(names)
+    now = timezone.now()
+    apps.get_model("recipes", "MediaFile").objects.bulk_create(
+        [
+            apps.get_model("recipes", "MediaFile")(
+                name=name, refcount=refcount, updated_at=now
+            )
+            for name, refcount in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0011_image_variants"),
+        ("users", "0005_avatar_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Имя файла"
+                    ),
+                ),
+                (
+                    "refcount",
+                    models.IntegerField(default=0, verbose_name="Число ссылок"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата изменения"),
+                ),
+            ],
+            options={
+                "verbose_name": "Медиафайл",
+                "verbose_name_plural": "Медиафайлы",
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from django.utils import timezone
 
 from foodgram.constants import (
+    JOB_MAX_ATTEMPTS,
     MAX_COOKING_TIME,
     MIN_COOKING_TIME,
     MIN_INGREDIENT_AMOUNT,
     MAX_INGREDIENT_AMOUNT,
 )
+from foodgram.models import CounterFieldsMixin
 
 User = settings.AUTH_USER_MODEL
 
@@ -15,6 +18,7 @@ User = settings.AUTH_USER_MODEL
 class Ingredient(models.Model):
     name = models.CharField("Название ингредиента", max_length=200)
     measurement_unit = models.CharField("Единица измерения", max_length=200)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
 
     class Meta:
         verbose_name = "Ингредиент"
@@ -30,7 +34,9 @@ class Ingredient(models.Model):
         return f"{self.name}, {self.measurement_unit}"
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
+    counter_fields = ("favorites_count", "in_carts_count")
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -39,6 +45,9 @@ class Recipe(models.Model):
     )
     name = models.CharField("Название рецепта", max_length=200)
     image = models.ImageField("Картинка", upload_to="recipes/")
+    image_variants = models.JSONField(
+        "Копии картинки", default=dict, blank=True, editable=False
+    )
     text = models.TextField("Описание рецепта")
     components = models.ManyToManyField(
         Ingredient, through="RecipeIngredient", verbose_name="Ингредиенты"
@@ -51,11 +60,17 @@ class Recipe(models.Model):
         ],
     )
     pub_date = models.DateTimeField("Дата публикации", auto_now_add=True)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+    favorites_count = models.IntegerField("В избранном", default=0, editable=False)
+    in_carts_count = models.IntegerField("В корзинах", default=0, editable=False)
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx")
+        ]
 
     def __str__(self):
         return self.name
@@ -118,7 +133,17 @@ class Favorite(models.Model):
         return f"{self.user} → {self.recipe}"
 
 
+def lock_recipe(recipe_id):
+    """Блокирует строку рецепта до конца текущей транзакции."""
+    list(Recipe.objects.select_for_update().filter(pk=recipe_id).values_list("pk"))
+
+
 class ShoppingList(models.Model):
+    """
+    Сохранение и удаление сначала блокируют рецепт, как и изменение его
+    состава: сигналы итогов корзины видят результат друг друга.
+    """
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -139,3 +164,217 @@ class ShoppingList(models.Model):
 
     def __str__(self):
         return f"{self.user} → {self.recipe}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            lock_recipe(self.recipe_id)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            lock_recipe(self.recipe_id)
+            return super().delete(*args, **kwargs)
+
+
+class ShoppingCartTotal(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart_totals",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, verbose_name="Ингредиент"
+    )
+    amount = models.IntegerField("Количество")
+
+    class Meta:
+        verbose_name = "Итог корзины"
+        verbose_name_plural = "Итоги корзины"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"], name="unique_cart_total"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} → {self.ingredient.name} – {self.amount}"
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar_recipes",
+        verbose_name="Рецепт",
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField("Сходство")
+
+    class Meta:
+        ordering = ["-score"]
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "similar"], name="unique_similar_recipe"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["recipe", "-score"], name="similar_recipe_score_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.recipe} ~ {self.similar} ({self.score:.2f})"
+
+
+class TimelineEntry(models.Model):
+    subscriber = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Подписчик",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Рецепт",
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", verbose_name="Автор"
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Лента подписок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["subscriber", "recipe"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["subscriber", "-pub_date", "-recipe"],
+                name="timeline_subscriber_idx",
+            ),
+            models.Index(fields=["subscriber", "author"], name="timeline_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subscriber} ← {self.recipe}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Запись журнала изменений для синхронизации клиентов. Изменения
+    рецептов общие (owner пустой), избранное, корзина и подписки
+    записываются для их владельца. owner хранится без внешнего ключа:
+    записи об удалении пишутся и при каскадном удалении пользователя.
+    """
+
+    class Kind(models.TextChoices):
+        RECIPE = "recipe", "Рецепт"
+        FAVORITE = "favorite", "Избранное"
+        SHOPPING_CART = "shopping_cart", "Корзина"
+        SUBSCRIPTION = "subscription", "Подписка"
+
+    class Action(models.TextChoices):
+        UPSERT = "upsert", "Создание или изменение"
+        DELETE = "delete", "Удаление"
+
+    owner = models.BigIntegerField("id владельца", null=True, blank=True)
+    kind = models.CharField("Тип объекта", max_length=20, choices=Kind.choices)
+    object_id = models.BigIntegerField("id объекта")
+    action = models.CharField("Действие", max_length=10, choices=Action.choices)
+    created_at = models.DateTimeField("Дата", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Запись журнала изменений"
+        verbose_name_plural = "Журнал изменений"
+        ordering = ["id"]
+        indexes = [models.Index(fields=["owner", "id"], name="changelog_owner_id_idx")]
+
+    def __str__(self):
+        return f"{self.action} {self.kind} {self.object_id}"
+
+
+class MediaFile(models.Model):
+    """Число ссылок из Recipe и User на файл в хранилище."""
+
+    name = models.CharField("Имя файла", max_length=255, unique=True)
+    refcount = models.IntegerField("Число ссылок", default=0)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+
+    class Meta:
+        verbose_name = "Медиафайл"
+        verbose_name_plural = "Медиафайлы"
+
+    def __str__(self):
+        return self.name
+
+
+class DataVersion(models.Model):
+    """
+    Номер версии данных, общий для всех процессов: по нему индексы
+    в памяти процесса узнают, что данные изменил другой процесс.
+    """
+
+    key = models.CharField("Ключ", max_length=255, primary_key=True)
+    value = models.BigIntegerField("Версия", default=0)
+
+    class Meta:
+        verbose_name = "Версия данных"
+        verbose_name_plural = "Версии данных"
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+
+class Job(models.Model):
+    """
+    Фоновая задача для команды run_jobs. Пока задача ждёт выполнения,
+    её ``key`` уникален: повторная постановка той же работы ничего
+    не добавляет. Выполненные задачи удаляются, упавшие остаются.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает"
+        RUNNING = "running", "Выполняется"
+        FAILED = "failed", "Ошибка"
+
+    name = models.CharField("Задача", max_length=255)
+    payload = models.JSONField("Аргументы", default=dict)
+    key = models.CharField(
+        "Ключ идемпотентности", max_length=255, null=True, blank=True
+    )
+    status = models.CharField(
+        "Статус", max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.IntegerField("Попыток", default=0)
+    max_attempts = models.IntegerField("Максимум попыток", default=JOB_MAX_ATTEMPTS)
+    run_at = models.DateTimeField("Выполнить после", default=timezone.now)
+    locked_at = models.DateTimeField("Взята в работу", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created_at = models.DateTimeField("Дата создания", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [models.Index(fields=["status", "run_at"], name="job_status_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(status="pending"),
+                name="job_pending_key_uniq",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,79 @@
+from collections import Counter, defaultdict
+
+from .models import RecipeIngredient
+from .search import VersionedIndex, bump_version
+
+PANTRY_INDEX_VERSION_KEY = "recipes:pantry-index-version"
+
+
+class PantryIndex(VersionedIndex):
+    """
+    Инвертированный индекс «ингредиент → рецепты» для подбора рецептов
+    по продуктам, которые есть у пользователя.
+    """
+
+    version_key = PANTRY_INDEX_VERSION_KEY
+
+    def load(self):
+        recipes = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.values_list(
+            "recipe_id", "component_id"
+        ):
+            recipes[recipe_id].add(ingredient_id)
+        return recipes.items()
+
+    def build(self, rows):
+        self._recipes = {}
+        self._postings = defaultdict(set)
+        for recipe_id, ingredient_ids in rows:
+            self.add(recipe_id, ingredient_ids)
+
+    def add(self, recipe_id, ingredient_ids):
+        ingredient_ids = frozenset(ingredient_ids)
+        if not ingredient_ids:
+            return
+        self._recipes[recipe_id] = ingredient_ids
+        for ingredient_id in ingredient_ids:
+            self._postings[ingredient_id].add(recipe_id)
+
+    def remove(self, recipe_id):
+        for ingredient_id in self._recipes.pop(recipe_id, ()):
+            recipe_ids = self._postings[ingredient_id]
+            recipe_ids.discard(recipe_id)
+            if not recipe_ids:
+                del self._postings[ingredient_id]
+
+    def match(self, ingredient_ids, limit=10, min_coverage=0.0):
+        """
+        Возвращает до ``limit`` кортежей (recipe_id, покрытие, недостающие
+        ингредиенты), от наибольшего покрытия к наименьшему.
+        """
+        self.ensure_loaded()
+        pantry = set(ingredient_ids)
+        matched = Counter()
+        for ingredient_id in pantry:
+            matched.update(self._postings.get(ingredient_id, ()))
+
+        results = []
+        for recipe_id, count in matched.items():
+            required = self._recipes[recipe_id]
+            coverage = count / len(required)
+            if coverage >= min_coverage:
+                results.append((recipe_id, coverage, required - pantry))
+        results.sort(key=lambda item: (-item[1], len(item[2]), -item[0]))
+        return results[:limit]
+
+
+pantry_index = PantryIndex()
+
+
+def update_pantry_index(recipe_id, ingredient_ids=None):
+    """Переносит в индекс новый состав рецепта или его удаление."""
+    pantry_index.apply(
+        bump_version(PANTRY_INDEX_VERSION_KEY), recipe_id, ingredient_ids
+    )
+
+
+def invalidate_pantry_index():
+    bump_version(PANTRY_INDEX_VERSION_KEY)
+    pantry_index.invalidate()
@@ -0,0 +1,55 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListTextRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return "\n".join(str(value) for value in data.values())
+        return str(data)
+
+    def stream(self, rows):
+        for row in rows:
+            yield f"{row['name']} — {row['amount']} {row['unit']}\n"
+
+
+class ShoppingListCSVRenderer(ShoppingListTextRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(("name", "amount", "measurement_unit"))
+        for row in rows:
+            yield writer.writerow((row["name"], row["amount"], row["unit"]))
+
+
+class ShoppingListJSONRenderer(JSONRenderer):
+    charset = "utf-8"
+
+    def stream(self, rows):
+        separator = "["
+        for row in rows:
+            yield separator + json.dumps(
+                {
+                    "name": row["name"],
+                    "amount": row["amount"],
+                    "measurement_unit": row["unit"],
+                },
+                ensure_ascii=False,
+            )
+            separator = ",\n"
+        yield "[]" if separator == "[" else "]"
@@ -0,0 +1,316 @@
+import heapq
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import DataVersion, Ingredient
+
+INGREDIENT_INDEX_VERSION_KEY = "recipes:ingredient-index-version"
+FUZZY_SIMILARITY_THRESHOLD = 0.3
+# В коротких словах одна опечатка меняет большую часть триграмм, поэтому
+# кандидаты ниже порога сравниваются по расстоянию редактирования слов.
+FUZZY_EDIT_SIMILARITY_THRESHOLD = 0.6
+FUZZY_EDIT_CANDIDATE_THRESHOLD = 0.1
+
+
+def normalize(text):
+    """Приводит строку к виду для сравнения без учёта регистра и «ё»."""
+    return text.casefold().replace("ё", "е").strip()
+
+
+def trigrams(text):
+    """Триграммы слов строки, дополненных пробелами, как в pg_trgm."""
+    result = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def edit_distance(a, b):
+    """Расстояние Левенштейна."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def word_similarity(query_words, name):
+    """
+    Среднее по словам запроса сходство с самым похожим словом названия:
+    1 - расстояние редактирования / длина более длинного слова.
+    """
+    name_words = normalize(name).split()
+    if not query_words or not name_words:
+        return 0
+    return sum(
+        max(
+            1 - edit_distance(query_word, word) / max(len(query_word), len(word))
+            for word in name_words
+        )
+        for query_word in query_words
+    ) / len(query_words)
+
+
+def get_version(key, backend=None):
+    """
+    Номер версии ``key`` в кэше ``backend`` или, без него, в таблице
+    DataVersion, общей для всех процессов.
+    """
+    if backend is not None:
+        return backend.get_or_set(key, 0, None)
+    return (
+        DataVersion.objects.filter(key=key).values_list("value", flat=True).first() or 0
+    )
+
+
+def bump_version(key, backend=None):
+    """Увеличивает номер версии ``key`` и возвращает новый номер."""
+    if backend is not None:
+        try:
+            return backend.incr(key)
+        except ValueError:
+            backend.set(key, 1, None)
+            return 1
+    with transaction.atomic():
+        versions = DataVersion.objects.filter(key=key)
+        if not versions.update(value=F("value") + 1):
+            _, created = DataVersion.objects.get_or_create(
+                key=key, defaults={"value": 1}
+            )
+            if not created:
+                versions.update(value=F("value") + 1)
+        return versions.values_list("value", flat=True).get()
+
+
+class VersionedIndex:
+    """
+    Структура данных в памяти процесса, построенная по данным из БД.
+
+    Индекс строится одним запросом при первом обращении. Номер версии
+    ``version_key`` хранится в таблице DataVersion: изменение данных
+    в одном процессе увеличивает его, и остальные процессы перестраивают
+    индекс при следующем обращении.
+    """
+
+    version_key = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+
+    def load(self):
+        raise NotImplementedError
+
+    def build(self, rows):
+        raise NotImplementedError
+
+    def add(self, key, entry):
+        raise NotImplementedError
+
+    def remove(self, key):
+        raise NotImplementedError
+
+    def ensure_loaded(self):
+        version = get_version(self.version_key)
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version == version:
+                return
+            self.build(self.load())
+            self._version = version
+
+    def apply(self, version, key, entry=None):
+        """
+        Применяет изменение одной записи, если индекс отстаёт ровно
+        на эту версию, иначе откладывает полную перестройку.
+        """
+        with self._lock:
+            if self._version != version - 1:
+                self._version = None
+                return
+            self.remove(key)
+            if entry is not None:
+                self.add(key, entry)
+            self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+
+class IngredientIndex(VersionedIndex):
+    """Копия каталога ингредиентов в памяти процесса."""
+
+    version_key = INGREDIENT_INDEX_VERSION_KEY
+
+    def load(self):
+        return (
+            {"id": pk, "name": name, "measurement_unit": unit}
+            for pk, name, unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            )
+        )
+
+
+class IngredientPrefixIndex(IngredientIndex):
+    """Отсортированный список названий для автодополнения по префиксу."""
+
+    def build(self, rows):
+        entries = sorted(((normalize(row["name"]), row["id"], row) for row in rows))
+        self._keys = [key for key, _, _ in entries]
+        self._entries = [entry for _, _, entry in entries]
+
+    def add(self, pk, entry):
+        key = normalize(entry["name"])
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._entries.insert(position, entry)
+
+    def remove(self, pk):
+        for position, entry in enumerate(self._entries):
+            if entry["id"] == pk:
+                del self._keys[position]
+                del self._entries[position]
+                return
+
+    def all(self):
+        self.ensure_loaded()
+        return list(self._entries)
+
+    def search(self, query, limit=None, substring=False):
+        """
+        Возвращает ингредиенты, начинающиеся с запроса; при ``substring``
+        после них идут содержащие запрос в середине названия.
+        """
+        self.ensure_loaded()
+        query = normalize(query)
+        if not query:
+            return self.all()[:limit]
+
+        keys, entries = self._keys, self._entries
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        results = entries[start:end]
+        if not substring or limit is not None and len(results) >= limit:
+            return results[:limit]
+
+        for position, key in enumerate(keys):
+            if query in key and not start <= position < end:
+                results.append(entries[position])
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+
+class IngredientTrigramIndex(IngredientIndex):
+    """Инвертированный индекс триграмм для поиска с опечатками."""
+
+    def build(self, rows):
+        self._entries = {}
+        self._postings = defaultdict(set)
+        for row in rows:
+            self.add(row["id"], row)
+
+    def add(self, pk, entry):
+        grams = trigrams(entry["name"])
+        self._entries[pk] = (entry, len(grams))
+        for gram in grams:
+            self._postings[gram].add(pk)
+
+    def remove(self, pk):
+        if pk not in self._entries:
+            return
+        entry, _ = self._entries.pop(pk)
+        for gram in trigrams(entry["name"]):
+            ids = self._postings[gram]
+            ids.discard(pk)
+            if not ids:
+                del self._postings[gram]
+
+    def search(
+        self,
+        query,
+        limit=10,
+        threshold=FUZZY_SIMILARITY_THRESHOLD,
+        edit_threshold=FUZZY_EDIT_SIMILARITY_THRESHOLD,
+    ):
+        """
+        Возвращает до ``limit`` ингредиентов с долей общих триграмм
+        не ниже ``threshold`` или, для кандидатов с долей от
+        FUZZY_EDIT_CANDIDATE_THRESHOLD, сходством слов по расстоянию
+        редактирования не ниже ``edit_threshold``. Сортирует по большему
+        из двух сходств, при равенстве выше названия с более длинным общим
+        с запросом началом, затем с большей долей общих триграмм и более
+        близкой длиной.
+        """
+        self.ensure_loaded()
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        query = normalize(query)
+        query_words = query.split()
+
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+
+        scored = []
+        for pk, common in shared.items():
+            entry, size = self._entries[pk]
+            overlap = common / (len(query_grams) + size - common)
+            if overlap < min(threshold, FUZZY_EDIT_CANDIDATE_THRESHOLD):
+                continue
+            similarity = max(overlap, word_similarity(query_words, entry["name"]))
+            if overlap < threshold and similarity < edit_threshold:
+                continue
+            name = normalize(entry["name"])
+            scored.append(
+                (
+                    similarity,
+                    len(os.path.commonprefix([query, name])),
+                    overlap,
+                    -abs(len(name) - len(query)),
+                    -pk,
+                    entry,
+                )
+            )
+
+        return [
+            {**item[-1], "similarity": round(item[0], 3)}
+            for item in heapq.nlargest(limit, scored, key=lambda item: item[:-1])
+        ]
+
+
+ingredient_index = IngredientPrefixIndex()
+ingredient_trigram_index = IngredientTrigramIndex()
+INGREDIENT_INDEXES = (ingredient_index, ingredient_trigram_index)
+
+
+def update_ingredient_indexes(pk, entry=None):
+    """Переносит в индексы сохранение (``entry``) или удаление ингредиента."""
+    version = bump_version(INGREDIENT_INDEX_VERSION_KEY)
+    for index in INGREDIENT_INDEXES:
+        index.apply(version, pk, entry)
+
+
+def invalidate_ingredient_indexes():
+    bump_version(INGREDIENT_INDEX_VERSION_KEY)
+    for index in INGREDIENT_INDEXES:
+        index.invalidate()
@@ -1,3 +1,7 @@
+import json
+from collections import Counter
+
+from django.db import transaction
 from rest_framework import serializers, generics, permissions
 
 from foodgram.constants import (
@@ -6,8 +10,11 @@ from foodgram.constants import (
     MAX_COOKING_TIME,
     MIN_COOKING_TIME,
 )
-from users.serializers import Base64ImageField, UserSerializer
+from users.serializers import Base64ImageField, ImageSrcsetField, UserSerializer
+from .cart import diff_amounts
+from .loaders import FAVORITE, SHOPPING_CART, cache_related, load_user_flags
 from .models import Recipe, Ingredient, RecipeIngredient
+from .dispatch import recipe_ingredients_changed
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -17,9 +24,8 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(), source="component"
-    )
+    # Ингредиенты по id загружает RecipeCreateSerializer одним запросом.
+    id = serializers.IntegerField(source="component")
     amount = serializers.IntegerField(
         min_value=MIN_INGREDIENT_AMOUNT, max_value=MAX_INGREDIENT_AMOUNT
     )
@@ -41,7 +47,7 @@ class RecipeIngredientReadSerializer(serializers.ModelSerializer):
 
 
 def create_recipe_ingredients(recipe, ingredients_data):
-    RecipeIngredient.objects.bulk_create(
+    rows = RecipeIngredient.objects.bulk_create(
         [
             RecipeIngredient(
                 recipe=recipe,
@@ -51,6 +57,53 @@ def create_recipe_ingredients(recipe, ingredients_data):
             for ingredient in ingredients_data
         ]
     )
+    cache_related(recipe, "recipe_ingredients", rows)
+    recipe_ingredients_changed.send(
+        sender=Recipe,
+        recipe=recipe,
+        old_amounts={},
+        new_amounts={item["component"].id: item["amount"] for item in ingredients_data},
+    )
+
+
+def update_recipe_ingredients(recipe, ingredients_data):
+    """
+    Приводит состав рецепта к ingredients_data не более чем тремя
+    запросами на запись: удаление, обновление количеств и вставка.
+    """
+    rows = {row.component_id: row for row in recipe.recipe_ingredients.all()}
+    old_amounts, new_amounts = diff_amounts(
+        {key: row.amount for key, row in rows.items()},
+        {item["component"].id: item["amount"] for item in ingredients_data},
+    )
+    removed = [rows[key].id for key in old_amounts.keys() - new_amounts.keys()]
+    changed = []
+    for key in old_amounts.keys() & new_amounts.keys():
+        rows[key].amount = new_amounts[key]
+        changed.append(rows[key])
+    added, result = [], []
+    for item in ingredients_data:
+        row = rows.get(item["component"].id)
+        if row is None:
+            row = RecipeIngredient(recipe=recipe, amount=item["amount"])
+            added.append(row)
+        row.component = item["component"]
+        result.append(row)
+    if old_amounts or new_amounts:
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ["amount"])
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        recipe_ingredients_changed.send(
+            sender=Recipe,
+            recipe=recipe,
+            old_amounts=old_amounts,
+            new_amounts=new_amounts,
+        )
+    # Порядок как у with_feed_relations: ответ совпадает с последующим чтением.
+    cache_related(recipe, "recipe_ingredients", sorted(result, key=lambda row: row.pk))
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -64,16 +117,41 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ("id", "name", "text", "cooking_time", "image", "ingredients")
 
+    def to_internal_value(self, data):
+        # В multipart-запросе с файлом изображения состав передаётся
+        # JSON-строкой.
+        if isinstance(data.get("ingredients"), str):
+            data = data.dict() if hasattr(data, "dict") else dict(data)
+            try:
+                data["ingredients"] = json.loads(data["ingredients"])
+            except ValueError:
+                raise serializers.ValidationError({"ingredients": "Некорректный JSON."})
+        return super().to_internal_value(data)
+
     def validate_ingredients(self, value):
         if not value:
             raise serializers.ValidationError("Нужно указать хотя бы один ингредиент.")
 
-        ingredient_ids = set()
-        for ingredient in value:
-            component = ingredient["component"]
-            if component in ingredient_ids:
-                raise serializers.ValidationError("Ингредиенты не должны повторяться.")
-            ingredient_ids.add(component)
+        ids = Counter(item["component"] for item in value)
+        ingredients = Ingredient.objects.in_bulk(ids)
+        errors = []
+        missing = sorted(ids.keys() - ingredients.keys())
+        if missing:
+            errors.append(
+                "Ингредиенты не найдены: " + ", ".join(map(str, missing)) + "."
+            )
+        duplicates = sorted(key for key, count in ids.items() if count > 1)
+        if duplicates:
+            errors.append(
+                "Ингредиенты не должны повторяться: "
+                + ", ".join(map(str, duplicates))
+                + "."
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        for item in value:
+            item["component"] = ingredients[item["component"]]
         return value
 
     def create(self, validated_data):
@@ -91,8 +169,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         instance.save()
 
         if ingredients_data is not None:
-            instance.recipe_ingredients.all().delete()
-            create_recipe_ingredients(instance, ingredients_data)
+            with transaction.atomic():
+                update_recipe_ingredients(instance, ingredients_data)
 
         return instance
 
@@ -106,12 +184,31 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class RecipeImageSerializer(serializers.ModelSerializer):
+    image = Base64ImageField()
+
+    class Meta:
+        model = Recipe
+        fields = ("image",)
+
+
+class RecipeFeedListSerializer(serializers.ListSerializer):
+    """Загружает флаги текущего пользователя сразу для всей страницы."""
+
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, "all") else data)
+        request = self.context.get("request")
+        self.context["user_flags"] = load_user_flags(request and request.user, recipes)
+        return super().to_representation(recipes)
+
+
 class RecipeListSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientReadSerializer(
         source="recipe_ingredients", many=True, read_only=True
     )
     image = serializers.ImageField()
+    image_srcset = ImageSrcsetField("image")
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -123,23 +220,28 @@ class RecipeListSerializer(serializers.ModelSerializer):
             "ingredients",
             "name",
             "image",
+            "image_srcset",
             "text",
             "cooking_time",
             "is_favorited",
             "is_in_shopping_cart",
+            "favorites_count",
         ]
+        read_only_fields = ("favorites_count",)
+        list_serializer_class = RecipeFeedListSerializer
+
+    def to_representation(self, instance):
+        if "user_flags" not in self.context:
+            self.context["user_flags"] = load_user_flags(
+                self.context["request"].user, [instance]
+            )
+        return super().to_representation(instance)
 
     def get_is_favorited(self, obj):
-        user = self.context["request"].user
-        if user.is_anonymous:
-            return False
-        return obj.favorites.filter(user=user).exists()
+        return obj.id in self.context["user_flags"][FAVORITE]
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context["request"].user
-        if user.is_anonymous:
-            return False
-        return obj.in_carts.filter(user=user).exists()
+        return obj.id in self.context["user_flags"][SHOPPING_CART]
 
 
 class RecipeRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -168,7 +270,8 @@ class RecipeCartSerializer(serializers.ModelSerializer):
 
 class RecipeShortSerializer(serializers.ModelSerializer):
     image = serializers.ImageField()
+    image_srcset = ImageSrcsetField("image")
 
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_srcset", "cooking_time")
@@ -4,15 +4,55 @@ import os
 
 from django.conf import settings
 from django.core.files import File
-from django.db.models.signals import post_migrate
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
-from .models import Ingredient, Recipe, RecipeIngredient
+from foodgram.cache import (
+    INGREDIENTS_TAG,
+    RECIPES_TAG,
+    ingredient_tag,
+    purge_responses,
+    recipe_tag,
+)
+from foodgram.images import is_variants_update, schedule_variants
+from users.models import Subscription
+
+from .fulltext import index_recipe, unindex_recipe
+from .counters import change_counter
+from .dispatch import recipe_ingredients_changed
+from .cart import change_cart_item_in_totals, update_recipe_in_totals
+from .jobs import enqueue
+from .loaders import update_user_membership
+from .media import release_references, remember_files, update_references
+from .models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingList,
+    SimilarRecipe,
+)
+from .pantry import invalidate_pantry_index, update_pantry_index
+from .timeline import backfill_subscription, fan_out_recipe, remove_subscription
+from .similarity import refresh_similar_recipes, schedule_recompute
+from .sync import Action, Kind, log_change
+from .search import invalidate_ingredient_indexes, update_ingredient_indexes
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+RECIPE_COUNTERS = {Favorite: "favorites_count", ShoppingList: "in_carts_count"}
+SYNC_KINDS = {Favorite: Kind.FAVORITE, ShoppingList: Kind.SHOPPING_CART}
+
 
 def load_json(filename):
     path = os.path.join(settings.BASE_DIR, "data", filename)
@@ -35,6 +75,9 @@ def create_ingredients(ingredients_data):
                 Ingredient(name=item["name"], measurement_unit=item["measurement_unit"])
             )
     Ingredient.objects.bulk_create(new_ingredients)
+    if new_ingredients:
+        invalidate_ingredient_indexes()
+        purge_responses(INGREDIENTS_TAG)
     logger.info(f"Добавлено ингредиентов: {len(new_ingredients)}")
 
 
@@ -96,6 +139,12 @@ def create_recipes(recipes_data):
                 )
 
             RecipeIngredient.objects.bulk_create(new_links)
+            recipe_ingredients_changed.send(
+                sender=Recipe,
+                recipe=recipe,
+                old_amounts={},
+                new_amounts={link.component_id: link.amount for link in new_links},
+            )
         else:
             logger.info(f"Рецепт {recipe.name} уже существует")
 
@@ -109,3 +158,272 @@ def load_test_data(sender, **kwargs):
     recipes_data = load_json("recipes.json")
     if recipes_data:
         create_recipes(recipes_data)
+
+
+@receiver(pre_save, sender=ShoppingList)
+def remember_cart_item(sender, instance, **kwargs):
+    instance._previous_item = None
+    if not instance._state.adding:
+        instance._previous_item = (
+            ShoppingList.objects.filter(pk=instance.pk)
+            .values_list("user_id", "recipe_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=ShoppingList)
+def add_cart_item_to_totals(sender, instance, **kwargs):
+    previous = instance._previous_item
+    if previous == (instance.user_id, instance.recipe_id):
+        return
+    if previous is not None:
+        user_id, recipe_id = previous
+        change_cart_item_in_totals(
+            ShoppingList(user_id=user_id, recipe_id=recipe_id), -1
+        )
+    change_cart_item_in_totals(instance, 1)
+
+
+@receiver(pre_delete, sender=ShoppingList)
+def remove_cart_item_from_totals(sender, instance, **kwargs):
+    """
+    pre_delete: при каскадном удалении рецепта его состав ещё не удалён.
+    """
+    change_cart_item_in_totals(instance, -1)
+
+
+@receiver(post_save, sender=Ingredient)
+def add_ingredient_to_indexes(sender, instance, **kwargs):
+    entry = {
+        "id": instance.pk,
+        "name": instance.name,
+        "measurement_unit": instance.measurement_unit,
+    }
+    transaction.on_commit(lambda: update_ingredient_indexes(entry["id"], entry))
+
+
+@receiver(post_delete, sender=Ingredient)
+def remove_ingredient_from_indexes(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: update_ingredient_indexes(pk))
+
+
+@receiver(post_save, sender=Recipe)
+def index_saved_recipe(sender, instance, update_fields=None, **kwargs):
+    if not is_variants_update(update_fields, "image_variants"):
+        index_recipe(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_deleted_recipe(sender, instance, **kwargs):
+    unindex_recipe(instance.pk)
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def update_cart_totals(sender, recipe, old_amounts, new_amounts, **kwargs):
+    update_recipe_in_totals(recipe, old_amounts, new_amounts)
+
+
+def is_composition_changed(old_amounts, new_amounts):
+    return old_amounts.keys() != new_amounts.keys()
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def update_recipe_in_pantry_index(sender, recipe, old_amounts, new_amounts, **kwargs):
+    if not is_composition_changed(old_amounts, new_amounts):
+        return
+    recipe_id = recipe.pk
+    transaction.on_commit(
+        lambda: update_pantry_index(
+            recipe_id,
+            set(
+                RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+                    "component_id", flat=True
+                )
+            ),
+        )
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_pantry_index(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: update_pantry_index(recipe_id))
+
+
+@receiver(post_delete, sender=Ingredient)
+def rebuild_pantry_index(sender, instance, **kwargs):
+    """
+    Каскад удаляет строки состава без recipe_ingredients_changed, поэтому
+    индекс перестраивается целиком.
+    """
+    transaction.on_commit(invalidate_pantry_index)
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def refresh_recipe_neighbours(sender, recipe, old_amounts, new_amounts, **kwargs):
+    if not is_composition_changed(old_amounts, new_amounts):
+        return
+    enqueue(refresh_similar_recipes, key=f"similar:{recipe.pk}", recipe_id=recipe.pk)
+
+
+@receiver(pre_delete, sender=Recipe)
+def refill_similar_lists(sender, instance, **kwargs):
+    """Каскад уберёт рецепт из чужих списков похожих, их нужно дополнить."""
+    schedule_recompute(
+        SimilarRecipe.objects.filter(similar_id=instance.pk).values_list(
+            "recipe_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "recipes_count", 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, "recipes_count", -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingList)
+def count_added_recipe_link(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], 1)
+        transaction.on_commit(lambda: update_user_membership(instance, True))
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingList)
+def count_removed_recipe_link(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], -1)
+    transaction.on_commit(lambda: update_user_membership(instance, False))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_created_recipe(sender, instance, created, **kwargs):
+    if created:
+        enqueue(fan_out_recipe, key=f"fan-out:{instance.pk}", recipe_id=instance.pk)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            backfill_subscription,
+            key=f"backfill:{instance.subscriber_id}:{instance.author_id}",
+            subscriber_id=instance.subscriber_id,
+            author_id=instance.author_id,
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def clean_up_timeline(sender, instance, **kwargs):
+    remove_subscription(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def purge_recipe_responses(sender, instance, **kwargs):
+    purge_responses(RECIPES_TAG, recipe_tag(instance.id))
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def purge_recipe_ingredient_responses(sender, recipe, **kwargs):
+    purge_responses(recipe_tag(recipe.id))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def purge_favorited_recipe_responses(sender, instance, **kwargs):
+    purge_responses(recipe_tag(instance.recipe_id))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def touch_favorited_recipe(sender, instance, **kwargs):
+    """favorites_count входит в ответ, поэтому меняет дату изменения рецепта."""
+    Recipe.objects.filter(pk=instance.recipe_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_with_ingredient(sender, instance, created=False, **kwargs):
+    if not created:
+        Recipe.objects.filter(recipe_ingredients__component=instance).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def purge_ingredient_responses(sender, instance, **kwargs):
+    purge_responses(INGREDIENTS_TAG, ingredient_tag(instance.id))
+
+
+@receiver(post_save, sender=Recipe)
+def log_saved_recipe(sender, instance, **kwargs):
+    """Готовые копии картинки меняют image_srcset, клиентам нужен и этот UPSERT."""
+    log_change(Kind.RECIPE, instance.id, Action.UPSERT)
+
+
+@receiver(post_delete, sender=Recipe)
+def log_deleted_recipe(sender, instance, **kwargs):
+    log_change(Kind.RECIPE, instance.id, Action.DELETE)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingList)
+def log_added_recipe_link(sender, instance, created, **kwargs):
+    if created:
+        log_change(
+            SYNC_KINDS[sender], instance.recipe_id, Action.UPSERT, instance.user_id
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingList)
+def log_removed_recipe_link(sender, instance, **kwargs):
+    log_change(SYNC_KINDS[sender], instance.recipe_id, Action.DELETE, instance.user_id)
+
+
+@receiver(post_save, sender=Subscription)
+def log_created_subscription(sender, instance, created, **kwargs):
+    if created:
+        log_change(
+            Kind.SUBSCRIPTION,
+            instance.author_id,
+            Action.UPSERT,
+            instance.subscriber_id,
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def log_deleted_subscription(sender, instance, **kwargs):
+    log_change(
+        Kind.SUBSCRIPTION, instance.author_id, Action.DELETE, instance.subscriber_id
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def build_recipe_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, "image", "image_variants")
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_files(sender, instance, update_fields=None, **kwargs):
+    remember_files(instance, update_fields)
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe_file_references(sender, instance, **kwargs):
+    update_references(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_files(sender, instance, **kwargs):
+    release_references(instance)
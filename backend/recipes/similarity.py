@@ -0,0 +1,199 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from .jobs import enqueue, task
+from .models import Recipe, RecipeIngredient, SimilarRecipe
+
+NEIGHBOURS_LIMIT = 10
+
+
+class RecipeVectors:
+    """
+    Разреженные векторы рецептов: ингредиенты с весом IDF.
+
+    Сходство — косинус между векторами, то есть сумма квадратов весов
+    общих ингредиентов, делённая на произведение норм. Редкие ингредиенты
+    весят больше, чем соль или вода.
+    """
+
+    def __init__(self, vectors, document_frequency, total):
+        self.vectors = vectors
+        self.postings = defaultdict(set)
+        for recipe_id, ingredient_ids in vectors.items():
+            for ingredient_id in ingredient_ids:
+                self.postings[ingredient_id].add(recipe_id)
+        self.weights = {
+            ingredient_id: math.log(1 + total / count)
+            for ingredient_id, count in document_frequency.items()
+        }
+        self.norms = {
+            recipe_id: math.sqrt(
+                sum(self.weights[ingredient_id] ** 2 for ingredient_id in ingredients)
+            )
+            for recipe_id, ingredients in vectors.items()
+        }
+
+    @classmethod
+    def load(cls, recipe_ids=None):
+        rows = RecipeIngredient.objects.all()
+        if recipe_ids is not None:
+            rows = rows.filter(recipe_id__in=recipe_ids)
+        vectors = defaultdict(set)
+        for recipe_id, ingredient_id in rows.values_list("recipe_id", "component_id"):
+            vectors[recipe_id].add(ingredient_id)
+
+        document_frequency = RecipeIngredient.objects.all()
+        if recipe_ids is not None:
+            document_frequency = document_frequency.filter(
+                component__in=set().union(*vectors.values())
+            )
+        document_frequency = dict(
+            document_frequency.values("component")
+            .annotate(count=Count("recipe", distinct=True))
+            .values_list("component", "count")
+        )
+        return cls(vectors, document_frequency, Recipe.objects.count())
+
+    def similarity(self, recipe_id, other_id):
+        shared = self.vectors[recipe_id] & self.vectors[other_id]
+        norm = self.norms[recipe_id] * self.norms[other_id]
+        if not shared or not norm:
+            return 0.0
+        return sum(self.weights[pk] ** 2 for pk in shared) / norm
+
+    def neighbours(self, recipe_id, limit=NEIGHBOURS_LIMIT):
+        """Ближайшие рецепты как список (score, id) по убыванию сходства."""
+        norm = self.norms.get(recipe_id)
+        if not norm:
+            return []
+        dot = Counter()
+        for ingredient_id in self.vectors[recipe_id]:
+            weight = self.weights[ingredient_id] ** 2
+            for other_id in self.postings[ingredient_id]:
+                if other_id != recipe_id:
+                    dot[other_id] += weight
+        return heapq.nlargest(
+            limit,
+            (
+                (score / (norm * self.norms[other_id]), other_id)
+                for other_id, score in dot.items()
+            ),
+        )
+
+
+def rebuild_similar_recipes(limit=NEIGHBOURS_LIMIT):
+    """Пересчитывает списки похожих рецептов для всего каталога."""
+    vectors = RecipeVectors.load()
+    rows = [
+        SimilarRecipe(recipe_id=recipe_id, similar_id=other_id, score=score)
+        for recipe_id in vectors.vectors
+        for score, other_id in vectors.neighbours(recipe_id, limit)
+    ]
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        SimilarRecipe.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def load_candidates(recipe_id):
+    """Рецепты с общими ингредиентами и векторы для них и самого рецепта."""
+    ingredient_ids = RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+        "component_id", flat=True
+    )
+    candidate_ids = set(
+        RecipeIngredient.objects.filter(component__in=ingredient_ids).values_list(
+            "recipe_id", flat=True
+        )
+    )
+    return candidate_ids, RecipeVectors.load(candidate_ids | {recipe_id})
+
+
+@task
+def recompute_similar_recipes(recipe_id, limit=NEIGHBOURS_LIMIT):
+    """Пересчитывает список соседей одного рецепта, не трогая чужие списки."""
+    _, vectors = load_candidates(recipe_id)
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(recipe_id=recipe_id).delete()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=other_id, score=score)
+            for score, other_id in vectors.neighbours(recipe_id, limit)
+        )
+
+
+def schedule_recompute(recipe_ids, limit=NEIGHBOURS_LIMIT):
+    for recipe_id in recipe_ids:
+        enqueue(
+            recompute_similar_recipes,
+            key=f"similar-list:{recipe_id}",
+            recipe_id=recipe_id,
+            limit=limit,
+        )
+
+
+@task
+def refresh_similar_recipes(recipe_id, limit=NEIGHBOURS_LIMIT):
+    """
+    Обновляет соседей рецепта после изменения его состава.
+
+    Список самого рецепта пересчитывается полностью. В списках рецептов
+    с общими ингредиентами он заменяет самого слабого соседа, если стал
+    ближе. Списки, из которых рецепт выбыл, пересчитываются отдельными
+    задачами, чтобы не укорачиваться. Веса IDF остальных рецептов
+    не пересчитываются — это делает команда rebuild_similar_recipes.
+    """
+    candidate_ids, vectors = load_candidates(recipe_id)
+
+    with transaction.atomic():
+        former_ids = set(
+            SimilarRecipe.objects.filter(similar_id=recipe_id).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        SimilarRecipe.objects.filter(recipe_id=recipe_id).delete()
+        SimilarRecipe.objects.filter(similar_id=recipe_id).delete()
+        if recipe_id not in vectors.vectors:
+            schedule_recompute(former_ids, limit)
+            return
+
+        neighbours = vectors.neighbours(recipe_id, limit)
+        rows = [
+            SimilarRecipe(recipe_id=recipe_id, similar_id=other_id, score=score)
+            for score, other_id in neighbours
+        ]
+
+        current = defaultdict(list)
+        for other_id, score in SimilarRecipe.objects.filter(
+            recipe_id__in=candidate_ids
+        ).values_list("recipe_id", "score"):
+            current[other_id].append(score)
+
+        displaced = []
+        kept_ids = set()
+        for other_id in candidate_ids - {recipe_id}:
+            score = vectors.similarity(other_id, recipe_id)
+            scores = current[other_id]
+            if len(scores) < limit:
+                kept_ids.add(other_id)
+                rows.append(
+                    SimilarRecipe(recipe_id=other_id, similar_id=recipe_id, score=score)
+                )
+            elif score > min(scores):
+                kept_ids.add(other_id)
+                displaced.append((other_id, min(scores)))
+                rows.append(
+                    SimilarRecipe(recipe_id=other_id, similar_id=recipe_id, score=score)
+                )
+
+        for other_id, score in displaced:
+            weakest = (
+                SimilarRecipe.objects.filter(recipe_id=other_id, score=score)
+                .order_by("-similar_id")
+                .values_list("id", flat=True)[:1]
+            )
+            SimilarRecipe.objects.filter(id__in=list(weakest)).delete()
+        SimilarRecipe.objects.bulk_create(rows)
+        schedule_recompute(former_ids - kept_ids, limit)
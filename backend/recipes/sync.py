@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from foodgram.constants import (
+    SYNC_PAGE_SIZE,
+    SYNC_RETENTION_DAYS,
+    SYNC_SETTLE_SECONDS,
+)
+from .models import ChangeLogEntry
+
+Kind = ChangeLogEntry.Kind
+Action = ChangeLogEntry.Action
+
+
+def log_change(kind, object_id, action, owner=None):
+    ChangeLogEntry.objects.create(
+        owner=owner, kind=kind, object_id=object_id, action=action
+    )
+
+
+def get_settled_entries():
+    """
+    Записи старше SYNC_SETTLE_SECONDS. Id выдаются до фиксации транзакции,
+    поэтому свежие записи с меньшим id могут ещё появиться; их отдают
+    позже, чтобы токен не перескочил через них.
+    """
+    boundary = timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    return ChangeLogEntry.objects.filter(created_at__lte=boundary)
+
+
+def get_current_token():
+    return get_settled_entries().aggregate(token=Max("id"))["token"] or 0
+
+
+def prune_change_log(days=SYNC_RETENTION_DAYS):
+    """Удаляет записи старше ``days`` дней и возвращает их число."""
+    boundary = timezone.now() - timedelta(days=days)
+    deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=boundary).delete()
+    return deleted
+
+
+def is_token_expired(since):
+    """
+    Токен — id записи журнала, а записи удаляет только prune_change_log.
+    Если записи токена нет, изменения после него могли быть удалены,
+    и клиенту нужна полная синхронизация. Токен 0 выдаётся при пустом
+    журнале и устаревает, если удалена первая запись.
+    """
+    if since == 0:
+        first = ChangeLogEntry.objects.aggregate(first=Min("id"))["first"]
+        return first is not None and first > 1
+    return not ChangeLogEntry.objects.filter(id=since).exists()
+
+
+def get_changes(user, since, limit=SYNC_PAGE_SIZE):
+    """
+    Изменения для пользователя после токена ``since``: id объектов
+    по типу и последнему действию, новый токен и признак, что
+    изменений больше ``limit``.
+    """
+    entries = list(
+        get_settled_entries()
+        .filter(Q(owner=None) | Q(owner=user.id), id__gt=since)
+        .values_list("id", "kind", "object_id", "action")[: limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for _, kind, object_id, action in entries:
+        latest[(kind, object_id)] = action
+    changes = {kind: {action: [] for action in Action} for kind in Kind}
+    for (kind, object_id), action in latest.items():
+        changes[kind][action].append(object_id)
+
+    token = entries[-1][0] if entries else since
+    return changes, token, has_more
@@ -0,0 +1,106 @@
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from recipes.cart import find_cart_mismatches
+from recipes.models import RecipeIngredient, ShoppingCartTotal, ShoppingList
+from .utils import create_ingredient, create_recipe, create_user, get_client
+
+
+class CartTotalsTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.flour, self.egg = create_ingredient(), create_ingredient()
+        self.pancakes = create_recipe(ingredients={self.flour: 200, self.egg: 2})
+        self.omelette = create_recipe(ingredients={self.egg: 3})
+
+    def get_totals(self, user=None):
+        return dict(
+            ShoppingCartTotal.objects.filter(user=user or self.user).values_list(
+                "ingredient_id", "amount"
+            )
+        )
+
+    def assert_consistent(self):
+        self.assertEqual(find_cart_mismatches(), {})
+
+    def test_add_and_remove_through_api(self):
+        for recipe in (self.pancakes, self.omelette):
+            response = self.client.post(f"/api/recipes/{recipe.pk}/shopping_cart/")
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_totals(), {self.flour.pk: 200, self.egg.pk: 5})
+        self.assertEqual(
+            self.client.post(
+                f"/api/recipes/{self.pancakes.pk}/shopping_cart/"
+            ).status_code,
+            400,
+        )
+
+        self.client.delete(f"/api/recipes/{self.pancakes.pk}/shopping_cart/")
+        self.assertEqual(self.get_totals(), {self.egg.pk: 3})
+        self.assert_consistent()
+
+    def test_recipe_update_reaches_carts(self):
+        ShoppingList.objects.create(user=self.user, recipe=self.pancakes)
+        milk = create_ingredient()
+        response = get_client(self.pancakes.author).patch(
+            f"/api/recipes/{self.pancakes.pk}/",
+            {
+                "ingredients": [
+                    {"id": self.egg.pk, "amount": 4},
+                    {"id": milk.pk, "amount": 100},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.get_totals(), {self.egg.pk: 4, milk.pk: 100})
+        self.assert_consistent()
+
+    def test_moved_cart_item_and_deleted_recipe(self):
+        item = ShoppingList.objects.create(user=self.user, recipe=self.pancakes)
+        item.recipe = self.omelette
+        item.save()
+        self.assertEqual(self.get_totals(), {self.egg.pk: 3})
+        self.omelette.delete()
+        self.assertEqual(self.get_totals(), {})
+        self.assert_consistent()
+
+    def test_standalone_ingredient_admin_updates_totals(self):
+        ShoppingList.objects.create(user=self.user, recipe=self.pancakes)
+        admin = create_user(is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        link = RecipeIngredient.objects.get(recipe=self.pancakes, component=self.egg)
+
+        response = self.client.post(
+            f"/admin/recipes/recipeingredient/{link.pk}/change/",
+            {"recipe": self.pancakes.pk, "component": self.egg.pk, "amount": 6},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_totals()[self.egg.pk], 6)
+
+        flour_link = RecipeIngredient.objects.get(
+            recipe=self.pancakes, component=self.flour
+        )
+        response = self.client.post(
+            f"/admin/recipes/recipeingredient/{flour_link.pk}/change/",
+            {"recipe": self.omelette.pk, "component": self.flour.pk, "amount": 200},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_totals(), {self.egg.pk: 6})
+
+        response = self.client.post(
+            f"/admin/recipes/recipeingredient/{link.pk}/delete/", {"post": "yes"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_totals(), {})
+        self.assert_consistent()
+
+    def test_rebuild_command_finds_and_fixes_drift(self):
+        ShoppingList.objects.create(user=self.user, recipe=self.pancakes)
+        RecipeIngredient.objects.filter(component=self.flour).update(amount=300)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_cart_totals", "--check", stdout=None)
+        call_command("rebuild_cart_totals", user_ids=[self.user.pk])
+        self.assertEqual(self.get_totals()[self.flour.pk], 300)
+        self.assert_consistent()
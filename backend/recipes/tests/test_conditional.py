@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from recipes.loaders import user_membership
+from recipes.models import ShoppingList
+from users.authentication import token_user_cache
+from users.models import Subscription
+from .utils import create_ingredient, create_recipe, create_user, get_client
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        user_membership.clear()
+        caches["responses"].clear()
+        self.ingredient = create_ingredient()
+        self.recipe = create_recipe(ingredients={self.ingredient: 1})
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+
+    def get_etag(self, client, url=None):
+        response = client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def assert_not_modified(self, client, etag, url=None):
+        response = client.get(url or self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assert_modified(self, client, etag, url=None):
+        response = client.get(url or self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_anonymous_revalidation(self):
+        client = get_client()
+        response = client.get(self.url)
+        self.assertIn("Last-Modified", response)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):
+            self.assert_not_modified(client, etag)
+
+        self.recipe.name = "Другое название"
+        self.recipe.save()
+        self.assert_modified(client, etag)
+
+    def test_related_changes_change_etag(self):
+        client = get_client()
+        etag = self.get_etag(client)
+        self.ingredient.name = "переименованный"
+        self.ingredient.save()
+        self.assert_modified(client, etag)
+
+        etag = self.get_etag(client)
+        self.recipe.author.first_name = "Другое"
+        self.recipe.author.save()
+        self.assert_modified(client, etag)
+
+    def test_user_flags_change_etag(self):
+        user = create_user()
+        client = get_client(user)
+        response = client.get(self.url)
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+        self.assert_not_modified(client, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ShoppingList.objects.create(user=user, recipe=self.recipe)
+        self.assert_modified(client, etag)
+
+        etag = self.get_etag(client)
+        Subscription.objects.create(subscriber=user, author=self.recipe.author)
+        self.assert_modified(client, etag)
+
+    def test_user_detail(self):
+        user = create_user()
+        client = get_client(user)
+        url = f"/api/users/{self.recipe.author_id}/"
+        etag = self.get_etag(client, url)
+        self.assert_not_modified(client, etag, url)
+        Subscription.objects.create(subscriber=user, author=self.recipe.author)
+        self.assert_modified(client, etag, url)
+
+    def test_missing_recipe(self):
+        self.assertEqual(get_client().get("/api/recipes/0/").status_code, 404)
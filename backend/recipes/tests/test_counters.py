@@ -0,0 +1,58 @@
+from django.test import TestCase
+
+from recipes.counters import find_counter_drift, reconcile_counters
+from recipes.models import Favorite, Recipe, ShoppingList
+from users.models import Subscription
+from .utils import create_recipe, create_user
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.author = create_user()
+        self.user = create_user()
+        self.recipe = create_recipe(author=self.author)
+
+    def test_counters_follow_links(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingList.objects.create(user=self.user, recipe=self.recipe)
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+        self.recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(self.recipe.in_carts_count, 1)
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual(self.author.recipes_count, 1)
+
+        Favorite.objects.all().delete()
+        self.recipe.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 0)
+        self.assertEqual(find_counter_drift(), [])
+
+    def test_save_of_stale_instance_keeps_counters(self):
+        stale_recipe = Recipe.objects.get(pk=self.recipe.pk)
+        stale_author = type(self.author).objects.get(pk=self.author.pk)
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+
+        stale_recipe.name = "Новое название"
+        stale_recipe.save()
+        stale_author.set_password("N3w-password!")
+        stale_author.save()
+
+        self.recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.recipe.name, "Новое название")
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertTrue(self.author.check_password("N3w-password!"))
+        self.assertEqual(find_counter_drift(), [])
+
+    def test_reconcile_fixes_drift(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=5)
+        self.assertEqual(
+            find_counter_drift(), [(Recipe, self.recipe.pk, "favorites_count", 5, 1)]
+        )
+        self.assertEqual(reconcile_counters(), 1)
+        self.assertEqual(find_counter_drift(), [])
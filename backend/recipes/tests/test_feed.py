@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.loaders import user_membership
+from recipes.models import Favorite
+from users.authentication import token_user_cache
+from users.models import Subscription
+from .utils import create_ingredient, create_recipe, create_user, get_client
+
+
+class RecipeFeedTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        user_membership.clear()
+        caches["responses"].clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.ingredients = [create_ingredient() for _ in range(3)]
+        self.authors = [create_user() for _ in range(3)]
+        self.recipes = [
+            create_recipe(author, {ingredient: 10 for ingredient in self.ingredients})
+            for author in self.authors
+            for _ in range(2)
+        ]
+        Subscription.objects.create(subscriber=self.user, author=self.authors[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=self.recipes[1])
+
+    def get_feed(self, limit):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/recipes/", {"limit": limit})
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"], len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.get_feed(1)
+        _, small = self.get_feed(2)
+        _, large = self.get_feed(len(self.recipes))
+        self.assertEqual(small, large)
+
+    def test_batched_fields_match_data(self):
+        results, _ = self.get_feed(len(self.recipes))
+        feed = {recipe["id"]: recipe for recipe in results}
+        for recipe in self.recipes:
+            item = feed[recipe.pk]
+            self.assertEqual(
+                item["author"]["is_subscribed"], recipe.author == self.authors[0]
+            )
+            self.assertEqual(item["is_favorited"], recipe == self.recipes[1])
+            self.assertFalse(item["is_in_shopping_cart"])
+            self.assertCountEqual(
+                [(row["id"], row["amount"]) for row in item["ingredients"]],
+                [(ingredient.pk, 10) for ingredient in self.ingredients],
+            )
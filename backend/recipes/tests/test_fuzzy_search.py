@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from recipes.search import (
+    IngredientTrigramIndex,
+    edit_distance,
+    ingredient_trigram_index,
+    word_similarity,
+)
+from .utils import create_ingredient, get_client
+
+
+class FuzzySearchTests(TestCase):
+    def setUp(self):
+        ingredient_trigram_index.invalidate()
+
+    def names(self, query, **kwargs):
+        return [
+            entry["name"] for entry in ingredient_trigram_index.search(query, **kwargs)
+        ]
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("малако", "молоко"), 2)
+        self.assertEqual(edit_distance("", "сыр"), 3)
+        self.assertAlmostEqual(word_similarity(["малако"], "молоко"), 2 / 3)
+
+    def test_short_word_typo_prefers_common_prefix(self):
+        results = ingredient_trigram_index.search("малако", limit=50)
+        names = [entry["name"] for entry in results]
+        self.assertEqual(names[0], "молоко")
+        self.assertIn("салака", names)
+        similarity = {entry["name"]: entry["similarity"] for entry in results}
+        self.assertEqual(similarity["молоко"], similarity["салака"])
+        self.assertLess(names.index("молоко"), names.index("салака"))
+
+    def test_typo_in_long_name(self):
+        self.assertEqual(self.names("сахр", limit=1), ["сахар"])
+
+    def test_unrelated_query_finds_nothing(self):
+        self.assertEqual(self.names("щщщщщ"), [])
+
+    def test_change_from_another_process_is_seen(self):
+        other_process_index = IngredientTrigramIndex()
+        self.assertNotIn("кваклизмус", self.names("кваклизмус"))
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ingredient(name="кваклизмус")
+        self.assertEqual(
+            [entry["name"] for entry in other_process_index.search("кваклизмс")][:1],
+            ["кваклизмус"],
+        )
+
+    def test_view_limits_results(self):
+        response = get_client().get(
+            "/api/ingredients/", {"fuzzy": "малако", "limit": 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["name"], "молоко")
+        self.assertEqual(len(response.data), 2)
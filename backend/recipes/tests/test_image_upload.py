@@ -0,0 +1,96 @@
+from django.test import TestCase
+from PIL import Image
+
+from recipes.models import Recipe
+from users.authentication import token_user_cache
+from .utils import (
+    create_ingredient,
+    create_recipe,
+    create_user,
+    get_client,
+    make_data_uri,
+    make_png,
+)
+
+
+class ImageUploadTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.recipe = create_recipe(self.user)
+        self.url = f"/api/recipes/{self.recipe.pk}/image/"
+
+    def assert_image(self, field, size):
+        field.open()
+        with Image.open(field) as image:
+            self.assertEqual(image.size, size)
+        field.close()
+
+    def test_raw_body_upload(self):
+        response = self.client.put(
+            self.url, make_png(40, 30).read(), content_type="image/png"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith(".png"))
+        self.assert_image(self.recipe.image, (40, 30))
+
+    def test_multipart_upload(self):
+        response = self.client.put(
+            self.url, {"image": make_png(20, 10)}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assert_image(self.recipe.image, (20, 10))
+
+    def test_only_author_can_replace_image(self):
+        response = get_client(create_user()).put(
+            self.url, make_png().read(), content_type="image/png"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_avatar_raw_body_upload(self):
+        response = self.client.put(
+            "/api/users/me/avatar/", make_png(16, 16).read(), content_type="image/png"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assert_image(self.user.avatar, (16, 16))
+
+    def test_base64_still_accepted(self):
+        response = self.client.put(
+            "/api/users/me/avatar/", {"avatar": make_data_uri()}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.put(
+            "/api/users/me/avatar/",
+            {"avatar": "data:image/png;base64,не base64"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_multipart_recipe_create(self):
+        ingredient = create_ingredient()
+        response = self.client.post(
+            "/api/recipes/",
+            {
+                "name": "Рецепт с файлом",
+                "text": "Описание",
+                "cooking_time": 5,
+                "image": make_png(30, 20),
+                "ingredients": f'[{{"id": {ingredient.pk}, "amount": 3}}]',
+            },
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        self.assert_image(recipe.image, (30, 20))
+        self.assertEqual(response.data["ingredients"][0]["amount"], 3)
+
+        response = self.client.post(
+            "/api/recipes/",
+            {"name": "Без состава", "ingredients": "[{", "image": make_png()},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
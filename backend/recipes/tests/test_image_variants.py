@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from foodgram.images import build_variants, get_srcset, make_variants
+from recipes.models import ChangeLogEntry, Job
+from recipes.sync import Kind
+from .utils import create_recipe, make_png
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.recipe = create_recipe()
+        self.recipe.image.save("test.png", make_png())
+
+    def test_variants_are_queued_once_per_image(self):
+        jobs = Job.objects.filter(key=f"variants:recipes.Recipe:{self.recipe.pk}")
+        self.assertEqual(jobs.count(), 1)
+        self.assertEqual(jobs.get().payload["variants_field"], "image_variants")
+
+    def test_variants_in_source_format_and_webp(self):
+        variants = make_variants(self.recipe.image.name)
+        self.assertEqual(variants["source"], self.recipe.image.name)
+        self.assertEqual(set(variants), {"source", "image/png", "image/webp"})
+        self.assertEqual(set(variants["image/webp"]), {"160", "320", "640"})
+
+    def test_srcset_falls_back_to_original(self):
+        self.assertEqual(
+            list(get_srcset(self.recipe.image, {}).values()),
+            [self.recipe.image.url],
+        )
+
+    def test_variant_save_is_logged_but_not_reindexed(self):
+        ChangeLogEntry.objects.all().delete()
+        with mock.patch("recipes.signals.index_recipe") as index_recipe:
+            build_variants(
+                model="recipes.Recipe",
+                pk=self.recipe.pk,
+                field_name="image",
+                variants_field="image_variants",
+            )
+        index_recipe.assert_not_called()
+        self.assertEqual(
+            list(ChangeLogEntry.objects.values_list("kind", "object_id", "action")),
+            [(Kind.RECIPE, self.recipe.pk, "upsert")],
+        )
+        self.recipe.refresh_from_db()
+        srcset = get_srcset(self.recipe.image, self.recipe.image_variants)
+        self.assertIn("640w", srcset["image/webp"])
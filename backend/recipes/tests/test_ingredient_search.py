@@ -0,0 +1,93 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from recipes.models import Ingredient
+from recipes.search import (
+    INGREDIENT_INDEX_VERSION_KEY,
+    IngredientPrefixIndex,
+    bump_version,
+    get_version,
+    ingredient_index,
+    normalize,
+)
+from .utils import create_ingredient, get_client
+
+
+class IngredientPrefixIndexTests(TestCase):
+    def setUp(self):
+        ingredient_index.invalidate()
+
+    def test_name_is_prefix_only(self):
+        results = ingredient_index.search("Со")
+        self.assertTrue(results)
+        self.assertTrue(
+            all(normalize(entry["name"]).startswith("со") for entry in results)
+        )
+        self.assertEqual(
+            len(results), Ingredient.objects.filter(name__istartswith="со").count()
+        )
+
+    def test_substring_puts_prefix_matches_first(self):
+        prefix = ingredient_index.search("со")
+        results = ingredient_index.search("со", substring=True)
+        self.assertEqual(results[: len(prefix)], prefix)
+        self.assertEqual(
+            len(results), Ingredient.objects.filter(name__icontains="со").count()
+        )
+
+    def test_change_from_another_process_is_seen(self):
+        other_process_index = IngredientPrefixIndex()
+        self.assertEqual(other_process_index.search("зззтест"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient = create_ingredient(name="зззтест")
+        self.assertEqual(
+            [entry["id"] for entry in other_process_index.search("зззтест")],
+            [ingredient.pk],
+        )
+
+        Ingredient.objects.filter(pk=ingredient.pk).update(name="ююютест")
+        bump_version(INGREDIENT_INDEX_VERSION_KEY)
+        self.assertEqual(other_process_index.search("зззтест"), [])
+        self.assertEqual(len(other_process_index.search("ююютест")), 1)
+
+    def test_version_is_shared_through_database(self):
+        version = get_version(INGREDIENT_INDEX_VERSION_KEY)
+        self.assertEqual(bump_version(INGREDIENT_INDEX_VERSION_KEY), version + 1)
+        self.assertEqual(get_version(INGREDIENT_INDEX_VERSION_KEY), version + 1)
+
+
+class IngredientListViewTests(TestCase):
+    url = "/api/ingredients/"
+
+    def setUp(self):
+        caches["responses"].clear()
+        ingredient_index.invalidate()
+        self.client = get_client()
+
+    def test_etag_depends_on_query(self):
+        by_name = self.client.get(self.url, {"name": "со"})
+        by_substring = self.client.get(self.url, {"contains": "со"})
+        self.assertNotEqual(by_name["ETag"], by_substring["ETag"])
+        self.assertGreater(len(by_substring.data), len(by_name.data))
+
+    def test_etag_follows_index_version(self):
+        response = self.client.get(self.url, {"name": "со"})
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get(
+                self.url, {"name": "со"}, HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ingredient(name="сотест")
+        response = self.client.get(self.url, {"name": "со"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("сотест", [entry["name"] for entry in response.data])
+
+    def test_validators_do_not_scan_catalogue(self):
+        response = self.client.get(self.url, {"name": "со"})
+        with self.assertNumQueries(1):
+            self.client.get(
+                self.url, {"name": "со"}, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.loaders import with_feed_relations
+from recipes.models import Recipe, RecipeIngredient, ShoppingCartTotal, ShoppingList
+from recipes.serializers import update_recipe_ingredients
+from .utils import create_ingredient, create_recipe, create_user, get_client
+
+
+class IngredientUpdateTests(TestCase):
+    def setUp(self):
+        self.flour, self.egg, self.milk, self.salt = (
+            create_ingredient() for _ in range(4)
+        )
+        self.recipe = create_recipe(
+            ingredients={self.flour: 200, self.egg: 2, self.milk: 300}
+        )
+        self.client = get_client(self.recipe.author)
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+
+    def get_rows(self):
+        return {
+            row.component_id: (row.pk, row.amount)
+            for row in RecipeIngredient.objects.filter(recipe=self.recipe)
+        }
+
+    def load_recipe(self):
+        return with_feed_relations(Recipe.objects.all()).get(pk=self.recipe.pk)
+
+    def test_only_changed_rows_are_written(self):
+        before = self.get_rows()
+        response = self.client.patch(
+            self.url,
+            {
+                "ingredients": [
+                    {"id": self.salt.pk, "amount": 5},
+                    {"id": self.flour.pk, "amount": 200},
+                    {"id": self.egg.pk, "amount": 3},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item["id"], item["amount"]) for item in response.data["ingredients"]],
+            [(self.flour.pk, 200), (self.egg.pk, 3), (self.salt.pk, 5)],
+        )
+        after = self.get_rows()
+        self.assertEqual(after[self.flour.pk], before[self.flour.pk])
+        self.assertEqual(after[self.egg.pk], (before[self.egg.pk][0], 3))
+        self.assertNotIn(self.milk.pk, after)
+        self.assertEqual(after[self.salt.pk][1], 5)
+
+    def test_same_composition_writes_nothing(self):
+        recipe = self.load_recipe()
+        data = [
+            {"component": row.component, "amount": row.amount}
+            for row in recipe.recipe_ingredients.all()
+        ]
+        with self.assertNumQueries(0):
+            update_recipe_ingredients(recipe, data)
+
+    def test_one_query_per_kind_of_change(self):
+        recipe = self.load_recipe()
+        data = [
+            {"component": self.flour, "amount": 250},
+            {"component": self.egg, "amount": 3},
+            {"component": self.salt, "amount": 5},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            update_recipe_ingredients(recipe, data)
+        writes = [
+            query["sql"].split()[0]
+            for query in queries
+            if '"recipes_recipeingredient"' in query["sql"]
+            and not query["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(sorted(writes), ["DELETE", "INSERT", "UPDATE"])
+        self.assertEqual(
+            {key: amount for key, (_, amount) in self.get_rows().items()},
+            {self.flour.pk: 250, self.egg.pk: 3, self.salt.pk: 5},
+        )
+
+    def test_cart_totals_follow_the_diff(self):
+        user = create_user()
+        ShoppingList.objects.create(user=user, recipe=self.recipe)
+        self.client.patch(
+            self.url,
+            {
+                "ingredients": [
+                    {"id": self.flour.pk, "amount": 100},
+                    {"id": self.salt.pk, "amount": 5},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(
+            dict(
+                ShoppingCartTotal.objects.filter(user=user).values_list(
+                    "ingredient_id", "amount"
+                )
+            ),
+            {self.flour.pk: 100, self.salt.pk: 5},
+        )
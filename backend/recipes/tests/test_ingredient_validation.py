@@ -0,0 +1,50 @@
+from django.test import TestCase
+
+from recipes.serializers import RecipeCreateSerializer
+from .utils import create_ingredient, create_recipe, get_client
+
+
+class IngredientValidationTests(TestCase):
+    def setUp(self):
+        self.ingredients = [create_ingredient() for _ in range(20)]
+        self.recipe = create_recipe(ingredients={self.ingredients[0]: 1})
+        self.client = get_client(self.recipe.author)
+
+    def patch(self, ingredients):
+        return self.client.patch(
+            f"/api/recipes/{self.recipe.pk}/",
+            {"ingredients": ingredients},
+            format="json",
+        )
+
+    def test_ingredients_are_loaded_with_one_query(self):
+        value = [
+            {"component": ingredient.pk, "amount": 1} for ingredient in self.ingredients
+        ]
+        with self.assertNumQueries(1):
+            value = RecipeCreateSerializer().validate_ingredients(value)
+        self.assertEqual([item["component"] for item in value], self.ingredients)
+
+    def test_missing_and_duplicate_ids_are_reported_together(self):
+        first, second = self.ingredients[:2]
+        response = self.patch(
+            [
+                {"id": first.pk, "amount": 1},
+                {"id": 0, "amount": 1},
+                {"id": first.pk, "amount": 2},
+                {"id": second.pk, "amount": 1},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["ingredients"],
+            [
+                "Ингредиенты не найдены: 0.",
+                f"Ингредиенты не должны повторяться: {first.pk}.",
+            ],
+        )
+
+    def test_empty_and_invalid_amounts(self):
+        self.assertEqual(self.patch([]).status_code, 400)
+        response = self.patch([{"id": self.ingredients[1].pk, "amount": 0}])
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,86 @@
+import threading
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from recipes.jobs import claim_jobs, enqueue, fail_job, run_job, task
+from recipes.models import Job
+
+calls = []
+done = threading.Event()
+
+
+@task
+def record(value):
+    calls.append(value)
+    done.set()
+
+
+@task
+def explode():
+    raise RuntimeError("сбой")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        Job.objects.all().delete()
+        calls.clear()
+        done.clear()
+
+    def test_enqueue_is_part_of_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue(record, value=1)
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_pending_key_is_unique(self):
+        enqueue(record, key="same", value=1)
+        enqueue(record, key="same", value=2)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_unregistered_function_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue(len)
+
+    def test_successful_job_is_deleted(self):
+        enqueue(record, value=3)
+        (pk,) = claim_jobs(10)
+        self.assertEqual(claim_jobs(10), [])
+        run_job(pk)
+        self.assertEqual(calls, [3])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_then_kept(self):
+        enqueue(explode, max_attempts=2)
+        job = Job.objects.get()
+        for attempts in (1, 2):
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.RUNNING, attempts=attempts
+            )
+            with self.assertLogs("recipes.jobs", "ERROR"):
+                run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIn("RuntimeError", job.last_error)
+
+    def test_retry_yields_to_already_pending_duplicate(self):
+        enqueue(record, key="same", value=1)
+        job = Job.objects.get()
+        Job.objects.filter(pk=job.pk).update(status=Job.Status.RUNNING, attempts=1)
+        enqueue(record, key="same", value=2)
+        job.refresh_from_db()
+        fail_job(job, "ошибка")
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(Job.objects.get().payload, {"value": 2})
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_job_runs_after_commit_outside_request(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            enqueue(record, value=4)
+        self.assertEqual(calls, [])
+        self.assertFalse(Job.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertTrue(done.wait(5))
+        self.assertEqual(calls, [4])
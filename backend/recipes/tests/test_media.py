@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.test import TestCase
+
+from recipes.media import collect_garbage
+from recipes.models import MediaFile
+from .utils import create_recipe, make_png
+
+
+class ContentAddressedMediaTests(TestCase):
+    def setUp(self):
+        self.first, self.second = create_recipe(), create_recipe()
+        self.first.image.save("first.png", make_png())
+        self.second.image.save("second.png", make_png())
+
+    def get_refcount(self, name):
+        return MediaFile.objects.get(name=name).refcount
+
+    def test_same_content_is_stored_once(self):
+        name = self.first.image.name
+        self.assertTrue(name.startswith("content/"))
+        self.assertEqual(self.second.image.name, name)
+        self.assertEqual(self.get_refcount(name), 2)
+
+        other = create_recipe()
+        other.image.save("other.png", make_png(color="green"))
+        self.assertNotEqual(other.image.name, name)
+
+    def test_references_follow_replacement_and_delete(self):
+        name = self.first.image.name
+        self.second.image.save("second.png", make_png(color="green"))
+        self.assertEqual(self.get_refcount(name), 1)
+        self.assertEqual(self.get_refcount(self.second.image.name), 1)
+
+        self.first.delete()
+        self.assertEqual(self.get_refcount(name), 0)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_garbage_collection(self):
+        released = self.first.image.name
+        self.first.delete()
+        self.second.delete()
+        kept = create_recipe()
+        kept.image.save("kept.png", make_png(color="green"))
+        orphan = default_storage.save("orphan.png", make_png(color="blue"))
+
+        # Файлы других тестов тоже могут остаться без ссылок.
+        self.assertNotIn(released, collect_garbage())
+        garbage = collect_garbage(timedelta(0), dry_run=True)
+        self.assertTrue({released, orphan} <= set(garbage))
+        self.assertNotIn(kept.image.name, garbage)
+        self.assertTrue(default_storage.exists(released))
+
+        collect_garbage(timedelta(0))
+        self.assertFalse(default_storage.exists(released))
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(kept.image.name))
+        self.assertFalse(MediaFile.objects.filter(name=released).exists())
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.loaders import FAVORITE, SHOPPING_CART, UserMembership, user_membership
+from recipes.models import Favorite, ShoppingList
+from .utils import create_recipe, create_user, get_client
+
+
+class UserMembershipTests(TestCase):
+    def setUp(self):
+        user_membership.clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.favorite, self.in_cart, self.other = (create_recipe() for _ in range(3))
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=self.favorite)
+            ShoppingList.objects.create(user=self.user, recipe=self.in_cart)
+
+    def get_ids(self, **params):
+        response = self.client.get("/api/recipes/", {"limit": 50, **params})
+        self.assertEqual(response.status_code, 200)
+        return {recipe["id"] for recipe in response.data["results"]}
+
+    def test_filters_use_exists_subqueries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_ids(is_favorited=1), {self.favorite.pk})
+        self.assertTrue(any("EXISTS" in query["sql"] for query in queries))
+        self.assertEqual(self.get_ids(is_in_shopping_cart=1), {self.in_cart.pk})
+
+    def test_flags_on_page(self):
+        response = self.client.get("/api/recipes/", {"limit": 50})
+        flags = {
+            recipe["id"]: (recipe["is_favorited"], recipe["is_in_shopping_cart"])
+            for recipe in response.data["results"]
+        }
+        self.assertEqual(flags[self.favorite.pk], (True, False))
+        self.assertEqual(flags[self.in_cart.pk], (False, True))
+        self.assertEqual(flags[self.other.pk], (False, False))
+
+    def test_sets_are_cached_until_version_changes(self):
+        user_membership.get(self.user.pk)
+        with self.assertNumQueries(1):
+            sets = user_membership.get(self.user.pk)
+        self.assertEqual(sets[FAVORITE], {self.favorite.pk})
+        self.assertEqual(sets[SHOPPING_CART], {self.in_cart.pk})
+
+    def test_change_from_another_process_is_seen(self):
+        other_process = UserMembership()
+        self.assertEqual(other_process.get(self.user.pk)[FAVORITE], {self.favorite.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=self.other)
+        self.assertEqual(
+            other_process.get(self.user.pk)[FAVORITE],
+            {self.favorite.pk, self.other.pk},
+        )
+        self.assertEqual(
+            user_membership.get(self.user.pk)[FAVORITE],
+            {self.favorite.pk, self.other.pk},
+        )
@@ -0,0 +1,66 @@
+from django.test import TestCase
+
+from recipes.pantry import PantryIndex, pantry_index
+from .utils import create_ingredient, create_recipe, get_client
+
+
+class PantryTests(TestCase):
+    url = "/api/recipes/pantry/"
+
+    def setUp(self):
+        pantry_index.invalidate()
+        self.flour, self.egg, self.milk = (create_ingredient() for _ in range(3))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pancakes = create_recipe(
+                ingredients={self.flour: 200, self.egg: 2, self.milk: 300}
+            )
+            self.omelette = create_recipe(ingredients={self.egg: 3, self.milk: 50})
+
+    def get(self, *ingredients, **params):
+        return get_client().get(
+            self.url,
+            {"ingredients": ",".join(str(item.pk) for item in ingredients), **params},
+        )
+
+    def test_match_orders_by_coverage(self):
+        matches = pantry_index.match({self.egg.pk, self.milk.pk})
+        self.assertEqual(
+            [(recipe_id, coverage) for recipe_id, coverage, _ in matches[:2]],
+            [(self.omelette.pk, 1.0), (self.pancakes.pk, 2 / 3)],
+        )
+        self.assertEqual(matches[1][2], {self.flour.pk})
+
+    def test_recipe_from_another_process_is_seen(self):
+        other_process_index = PantryIndex()
+        other_process_index.ensure_loaded()
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe(ingredients={self.flour: 100})
+        matches = other_process_index.match({self.flour.pk}, min_coverage=1)
+        self.assertIn(recipe.pk, [recipe_id for recipe_id, _, _ in matches])
+
+    def test_deleted_ingredient_leaves_index(self):
+        pantry_index.ensure_loaded()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour.delete()
+        response = self.get(self.egg, self.milk, min_coverage=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {item["recipe"]["id"] for item in response.data},
+            {self.omelette.pk, self.pancakes.pk},
+        )
+
+    def test_stale_index_does_not_fail(self):
+        pantry_index.ensure_loaded()
+        self.flour.delete()
+        response = self.get(self.egg, self.milk)
+        self.assertEqual(response.status_code, 200)
+        pancakes = next(
+            item for item in response.data if item["recipe"]["id"] == self.pancakes.pk
+        )
+        self.assertEqual(pancakes["missing"], [])
+
+    def test_ingredients_are_required(self):
+        self.assertEqual(get_client().get(self.url).status_code, 400)
+        self.assertEqual(
+            get_client().get(self.url, {"ingredients": "a"}).status_code, 400
+        )
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+
+from .utils import create_ingredient, create_recipe, create_user, get_client
+
+URL = "/api/recipes/download_shopping_cart/"
+
+
+class ShoppingListExportTests(TestCase):
+    def setUp(self):
+        self.client = get_client(create_user())
+        flour = create_ingredient("Мука, высший сорт", "г")
+        egg = create_ingredient('Яйцо "С0"', "шт")
+        for ingredients in ({flour: 200, egg: 2}, {egg: 3}):
+            recipe = create_recipe(ingredients=ingredients)
+            self.client.post(f"/api/recipes/{recipe.pk}/shopping_cart/")
+
+    def download(self, **kwargs):
+        response = self.client.get(URL, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_text_is_default(self):
+        response, content = self.download()
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn("shopping_cart.txt", response["Content-Disposition"])
+        self.assertEqual(content, 'Мука, высший сорт — 200 г\nЯйцо "С0" — 5 шт\n')
+
+    def test_csv_by_format_param(self):
+        response, content = self.download(data={"format": "csv"})
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertEqual(
+            list(csv.reader(io.StringIO(content))),
+            [
+                ["name", "amount", "measurement_unit"],
+                ["Мука, высший сорт", "200", "г"],
+                ['Яйцо "С0"', "5", "шт"],
+            ],
+        )
+
+    def test_json_by_accept_header(self):
+        response, content = self.download(HTTP_ACCEPT="application/json")
+        self.assertIn("shopping_cart.json", response["Content-Disposition"])
+        self.assertEqual(
+            json.loads(content),
+            [
+                {"name": "Мука, высший сорт", "amount": 200, "measurement_unit": "г"},
+                {"name": 'Яйцо "С0"', "amount": 5, "measurement_unit": "шт"},
+            ],
+        )
+
+    def test_empty_cart(self):
+        response = get_client(create_user()).get(URL, {"format": "json"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from recipes.models import Job, RecipeIngredient, SimilarRecipe
+from recipes.similarity import (
+    RecipeVectors,
+    rebuild_similar_recipes,
+    refresh_similar_recipes,
+)
+from .utils import create_ingredient, create_recipe, run_pending_jobs
+
+
+class SimilarRecipesTests(TestCase):
+    def setUp(self):
+        self.common, self.rare, self.other = (create_ingredient() for _ in range(3))
+        self.recipe = create_recipe(ingredients={self.common: 1, self.rare: 1})
+        self.twin = create_recipe(ingredients={self.common: 1, self.rare: 1})
+        self.cousin = create_recipe(ingredients={self.common: 1})
+        Job.objects.all().delete()
+
+    def get_similar(self, recipe):
+        return list(
+            SimilarRecipe.objects.filter(recipe=recipe).values_list(
+                "similar_id", flat=True
+            )
+        )
+
+    def test_neighbours_are_ranked_by_cosine(self):
+        vectors = RecipeVectors.load()
+        neighbours = vectors.neighbours(self.recipe.pk)
+        self.assertEqual(neighbours[0][1], self.twin.pk)
+        self.assertAlmostEqual(neighbours[0][0], 1.0)
+        self.assertLess(vectors.similarity(self.recipe.pk, self.cousin.pk), 1.0)
+
+    def test_recipe_leaving_full_list_is_replaced(self):
+        rebuild_similar_recipes(limit=1)
+        self.assertEqual(self.get_similar(self.twin), [self.recipe.pk])
+
+        RecipeIngredient.objects.filter(recipe=self.recipe).delete()
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, component=self.other, amount=1
+        )
+        refresh_similar_recipes(self.recipe.pk, limit=1)
+        run_pending_jobs(prefix="recipes.similarity")
+        self.assertEqual(self.get_similar(self.twin), [self.cousin.pk])
+        self.assertEqual(self.get_similar(self.recipe), [])
+
+    def test_deleted_recipe_is_replaced(self):
+        rebuild_similar_recipes(limit=1)
+        self.recipe.delete()
+        run_pending_jobs(prefix="recipes.similarity")
+        self.assertEqual(self.get_similar(self.twin), [self.cousin.pk])
+
+    def test_composition_change_queues_refresh(self):
+        recipe = create_recipe(ingredients={self.rare: 1})
+        self.assertTrue(Job.objects.filter(name__endswith="refresh_similar_recipes"))
+        run_pending_jobs(prefix="recipes.similarity")
+        self.assertCountEqual(self.get_similar(recipe), [self.recipe.pk, self.twin.pk])
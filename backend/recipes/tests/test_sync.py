@@ -0,0 +1,93 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import ChangeLogEntry, Favorite, ShoppingList
+from recipes.sync import Action, Kind, get_changes
+from users.authentication import token_user_cache
+from users.models import Subscription
+from .utils import create_recipe, create_user, get_client
+
+URL = "/api/sync/"
+
+
+@mock.patch("recipes.sync.SYNC_SETTLE_SECONDS", 0)
+class SyncTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.recipe = create_recipe()
+
+    def get_token(self):
+        return self.client.get(URL).data["token"]
+
+    def sync(self, since):
+        response = self.client.get(URL, {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_changes_after_token(self):
+        token = self.get_token()
+        other = create_user()
+        recipe = create_recipe(other)
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        Favorite.objects.create(user=other, recipe=self.recipe)
+        ShoppingList.objects.create(user=self.user, recipe=self.recipe)
+        Subscription.objects.create(subscriber=self.user, author=other)
+
+        data = self.sync(token)
+        self.assertEqual(
+            [item["id"] for item in data["recipes"]["upserted"]], [recipe.pk]
+        )
+        self.assertEqual(data["favorites"], {"upserted": [recipe.pk], "deleted": []})
+        self.assertEqual(
+            data["shopping_cart"], {"upserted": [self.recipe.pk], "deleted": []}
+        )
+        self.assertEqual(data["subscriptions"]["upserted"], [other.pk])
+        self.assertFalse(data["has_more"])
+
+        data = self.sync(data["token"])
+        self.assertEqual(data["recipes"], {"upserted": [], "deleted": []})
+        self.assertEqual(data["favorites"], {"upserted": [], "deleted": []})
+
+    def test_latest_action_wins(self):
+        token = self.get_token()
+        recipe = create_recipe()
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        Favorite.objects.filter(user=self.user).delete()
+        recipe_id = recipe.pk
+        recipe.delete()
+
+        data = self.sync(token)
+        self.assertEqual(data["recipes"], {"upserted": [], "deleted": [recipe_id]})
+        self.assertEqual(data["favorites"], {"upserted": [], "deleted": [recipe_id]})
+
+    def test_pages_by_limit(self):
+        since = int(self.get_token())
+        recipes = [create_recipe() for _ in range(3)]
+        seen = []
+        for _ in range(10):
+            changes, since, has_more = get_changes(self.user, since, limit=2)
+            seen.extend(changes[Kind.RECIPE][Action.UPSERT])
+            if not has_more:
+                break
+        self.assertEqual(seen, [recipe.pk for recipe in recipes])
+
+    def test_pruned_token_is_gone(self):
+        token = self.get_token()
+        create_recipe()
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=60))
+        call_command("prune_change_log", days=30, stdout=mock.MagicMock())
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+        response = self.client.get(URL, {"since": token})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.sync(response.data["token"])["recipes"]["upserted"], [])
+
+    def test_invalid_token(self):
+        self.assertEqual(self.client.get(URL, {"since": "abc"}).status_code, 400)
+        self.assertEqual(get_client().get(URL).status_code, 401)
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from recipes.models import TimelineEntry
+from users.authentication import token_user_cache
+from users.models import Subscription
+from .utils import create_recipe, create_user, get_client, run_pending_jobs
+
+URL = "/api/recipes/timeline/"
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.author = create_user()
+
+    def get_timeline(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe["id"] for recipe in response.data["results"]]
+
+    def subscribe(self, author):
+        Subscription.objects.create(subscriber=self.user, author=author)
+        run_pending_jobs(prefix="recipes.timeline")
+
+    def test_new_recipe_is_fanned_out_to_subscribers(self):
+        self.subscribe(self.author)
+        recipe = create_recipe(self.author)
+        create_recipe()
+        run_pending_jobs(prefix="recipes.timeline")
+        self.assertTrue(
+            TimelineEntry.objects.filter(subscriber=self.user, recipe=recipe).exists()
+        )
+        self.assertEqual(self.get_timeline(), [recipe.pk])
+
+    def test_subscription_backfills_and_unsubscribe_cleans_up(self):
+        older, newer = create_recipe(self.author), create_recipe(self.author)
+        self.subscribe(self.author)
+        self.assertEqual(self.get_timeline(), [newer.pk, older.pk])
+        Subscription.objects.filter(subscriber=self.user).delete()
+        self.assertFalse(TimelineEntry.objects.filter(subscriber=self.user).exists())
+        self.assertEqual(self.get_timeline(), [])
+
+    @mock.patch("recipes.timeline.TIMELINE_FANOUT_THRESHOLD", 1)
+    def test_popular_author_is_read_on_request(self):
+        regular = create_user()
+        self.subscribe(regular)
+        Subscription.objects.create(subscriber=create_user(), author=self.author)
+        self.subscribe(self.author)
+        popular_recipe = create_recipe(self.author)
+        regular_recipe = create_recipe(regular)
+        run_pending_jobs(prefix="recipes.timeline")
+        self.assertFalse(TimelineEntry.objects.filter(author=self.author).exists())
+        self.assertTrue(TimelineEntry.objects.filter(author=regular).exists())
+        self.assertEqual(
+            set(self.get_timeline()), {popular_recipe.pk, regular_recipe.pk}
+        )
+
+    def test_cursor_pages_merge_sources(self):
+        self.subscribe(self.author)
+        recipes = [create_recipe(self.author) for _ in range(3)]
+        run_pending_jobs(prefix="recipes.timeline")
+        first = self.client.get(URL, {"limit": 2}).data
+        second = self.client.get(first["next"]).data
+        self.assertEqual(
+            [recipe["id"] for recipe in first["results"] + second["results"]],
+            [recipe.pk for recipe in reversed(recipes)],
+        )
+        self.assertIsNone(second["next"])
@@ -0,0 +1,102 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.loaders import user_membership
+from recipes.models import Favorite
+from users.authentication import token_user_cache
+from .utils import (
+    create_ingredient,
+    create_recipe,
+    create_user,
+    get_client,
+    make_data_uri,
+)
+
+READ_TABLES = ('FROM "recipes_recipeingredient"', 'FROM "recipes_favorite"')
+
+
+class WriteResponseTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        user_membership.clear()
+        caches["responses"].clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.ingredients = [create_ingredient() for _ in range(3)]
+
+    def write(self, method, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format="json")
+        # До записи представление может читать состав и флаги, после —
+        # ответ строится из объектов в памяти.
+        sql = [query["sql"] for query in queries]
+        first_write = next(
+            index
+            for index, statement in enumerate(sql)
+            if statement.startswith(
+                ('INSERT INTO "recipes_recipe"', 'UPDATE "recipes_recipe"')
+            )
+        )
+        rereads = [
+            statement
+            for statement in sql[first_write:]
+            if any(table in statement for table in READ_TABLES)
+        ]
+        self.assertEqual(rereads, [])
+        return response
+
+    def assert_matches_read(self, response):
+        read = self.client.get(f"/api/recipes/{response.data['id']}/")
+        self.assertEqual(response.data, read.data)
+
+    def test_create_response(self):
+        response = self.write(
+            "post",
+            "/api/recipes/",
+            {
+                "name": "Блины",
+                "text": "Смешать и жарить",
+                "cooking_time": 20,
+                "image": make_data_uri(),
+                "ingredients": [
+                    {"id": ingredient.pk, "amount": 2}
+                    for ingredient in self.ingredients
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.data["is_favorited"])
+        self.assertEqual(response.data["author"]["id"], self.user.pk)
+        self.assertEqual(
+            [item["id"] for item in response.data["ingredients"]],
+            [ingredient.pk for ingredient in self.ingredients],
+        )
+        self.assert_matches_read(response)
+
+    def test_update_response(self):
+        recipe = create_recipe(self.user, {self.ingredients[0]: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=recipe)
+        # Флаги ответа берутся из множеств в памяти, если они уже загружены.
+        user_membership.get(self.user.pk)
+        response = self.write(
+            "patch",
+            f"/api/recipes/{recipe.pk}/",
+            {
+                "name": "Новое название",
+                "ingredients": [
+                    {"id": self.ingredients[2].pk, "amount": 5},
+                    {"id": self.ingredients[0].pk, "amount": 1},
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Новое название")
+        self.assertTrue(response.data["is_favorited"])
+        self.assertEqual(
+            [(item["id"], item["amount"]) for item in response.data["ingredients"]],
+            [(self.ingredients[0].pk, 1), (self.ingredients[2].pk, 5)],
+        )
+        self.assert_matches_read(response)
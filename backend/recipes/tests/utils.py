@@ -0,0 +1,92 @@
+import base64
+from io import BytesIO
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.jobs import claim_jobs, run_job
+from recipes.models import Ingredient, Job, Recipe, RecipeIngredient
+from recipes.dispatch import recipe_ingredients_changed
+
+User = get_user_model()
+
+numbers = count(1)
+
+
+def create_user(**fields):
+    number = next(numbers)
+    fields = {
+        "email": f"user{number}@test.ru",
+        "username": f"user{number}",
+        "first_name": "Имя",
+        "last_name": "Фамилия",
+        **fields,
+    }
+    return User.objects.create_user(password="Pa55word!", **fields)
+
+
+def create_ingredient(name=None, measurement_unit="г"):
+    return Ingredient.objects.create(
+        name=name or f"тестовый ингредиент {next(numbers)}",
+        measurement_unit=measurement_unit,
+    )
+
+
+def create_recipe(author=None, ingredients=None, **fields):
+    """Рецепт с составом ``{ингредиент: количество}``, как из API."""
+    fields = {
+        "name": f"Рецепт {next(numbers)}",
+        "text": "Описание",
+        "cooking_time": 10,
+        "image": "recipes/test.png",
+        **fields,
+    }
+    recipe = Recipe.objects.create(author=author or create_user(), **fields)
+    ingredients = ingredients or {}
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, component=ingredient, amount=amount)
+        for ingredient, amount in ingredients.items()
+    )
+    recipe_ingredients_changed.send(
+        sender=Recipe,
+        recipe=recipe,
+        old_amounts={},
+        new_amounts={
+            ingredient.pk: amount for ingredient, amount in ingredients.items()
+        },
+    )
+    return recipe
+
+
+def make_png(width=800, height=400, color="orange"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "PNG")
+    return ContentFile(buffer.getvalue(), name="test.png")
+
+
+def make_data_uri(image=None):
+    image = image or make_png()
+    return "data:image/png;base64," + base64.b64encode(image.read()).decode()
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
+
+
+def run_pending_jobs(prefix=""):
+    """
+    Выполняет задачи из очереди, как работник run_jobs. ``prefix``
+    ограничивает их модулем: у тестовых рецептов нет файлов картинок.
+    """
+    Job.objects.exclude(name__startswith=prefix).delete()
+    while pks := claim_jobs(100):
+        for pk in pks:
+            run_job(pk)
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from foodgram.constants import TIMELINE_BACKFILL_LIMIT, TIMELINE_FANOUT_THRESHOLD
+from users.models import Subscription
+from .jobs import task
+from .models import Recipe, TimelineEntry
+
+User = get_user_model()
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def is_fanned_out(author_id):
+    """
+    Рецепты автора раскладываются по лентам подписчиков при публикации,
+    пока подписчиков не больше порога; у популярных авторов лента
+    дочитывается из таблицы рецептов при запросе.
+    """
+    return User.objects.filter(
+        pk=author_id, subscribers_count__lte=TIMELINE_FANOUT_THRESHOLD
+    ).exists()
+
+
+@task
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or not is_fanned_out(recipe.author_id):
+        return
+    subscriber_ids = Subscription.objects.filter(
+        author_id=recipe.author_id
+    ).values_list("subscriber_id", flat=True)
+    batch = []
+    for subscriber_id in subscriber_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(
+            TimelineEntry(
+                subscriber_id=subscriber_id,
+                recipe=recipe,
+                author_id=recipe.author_id,
+                pub_date=recipe.pub_date,
+            )
+        )
+        if len(batch) == FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+@task
+def backfill_subscription(subscriber_id, author_id, limit=TIMELINE_BACKFILL_LIMIT):
+    """Добавляет в ленту подписчика последние рецепты нового автора."""
+    if not Subscription.objects.filter(
+        subscriber_id=subscriber_id, author_id=author_id
+    ).exists() or not is_fanned_out(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).order_by("-pub_date", "-id")[
+        :limit
+    ]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                subscriber_id=subscriber_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for recipe_id, pub_date in recipes.values_list("id", "pub_date")
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_subscription(subscription):
+    TimelineEntry.objects.filter(
+        subscriber_id=subscription.subscriber_id, author_id=subscription.author_id
+    ).delete()
+
+
+def get_timeline_sources(user):
+    """
+    Источники ленты с общими полями pub_date и recipe_id: записи
+    из таблицы ленты и рецепты популярных авторов, читаемые напрямую.
+    """
+    popular_authors = User.objects.filter(
+        subscribers__subscriber=user,
+        subscribers_count__gt=TIMELINE_FANOUT_THRESHOLD,
+    ).values("id")
+    return [
+        TimelineEntry.objects.filter(subscriber=user),
+        Recipe.objects.filter(author__in=popular_authors).annotate(recipe_id=F("id")),
+    ]
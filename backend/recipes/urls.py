@@ -6,9 +6,14 @@ from .views import (
     RecipeListCreateView,
     RecipeDetailView,
     RecipeGetLinkView,
+    RecipeImageView,
     ShoppingCartAddView,
     DownloadShoppingCartView,
     FavoriteAddView,
+    RecipePantryView,
+    SimilarRecipesView,
+    SyncView,
+    TimelineView,
 )
 
 urlpatterns = [
@@ -18,13 +23,26 @@ urlpatterns = [
         IngredientDetailView.as_view(),
         name="ingredient-detail",
     ),
+    path("sync/", SyncView.as_view(), name="sync"),
     path("recipes/", RecipeListCreateView.as_view(), name="recipe-list-create"),
+    path("recipes/timeline/", TimelineView.as_view(), name="recipe-timeline"),
+    path("recipes/pantry/", RecipePantryView.as_view(), name="recipe-pantry"),
     path("recipes/<int:pk>/", RecipeDetailView.as_view(), name="recipe-detail"),
     path(
         "recipes/<int:id>/get-link/",
         RecipeGetLinkView.as_view(),
         name="recipe-get-link",
     ),
+    path(
+        "recipes/<int:pk>/image/",
+        RecipeImageView.as_view(),
+        name="recipe-image",
+    ),
+    path(
+        "recipes/<int:pk>/similar/",
+        SimilarRecipesView.as_view(),
+        name="recipe-similar",
+    ),
     path(
         "recipes/<int:pk>/shopping_cart/",
         ShoppingCartAddView.as_view(),
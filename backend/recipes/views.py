@@ -1,32 +1,171 @@
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from http import HTTPStatus
-from django.db.models import Sum, F
-
-from recipes.models import Ingredient, Recipe, ShoppingList, RecipeIngredient, Favorite
+from django.db.models import Exists, F, OuterRef
+
+from foodgram.cache import (
+    INGREDIENTS_TAG,
+    RECIPES_TAG,
+    cache_anonymous_response,
+    conditional_response,
+    ingredient_tag,
+    make_etag,
+    recipe_tag,
+    user_tag,
+)
+from users.models import Subscription
+from users.parsers import ImageUploadParser
+from foodgram.pagination import RecipeKeysetPagination, TimelinePagination
+from recipes.fulltext import search_recipes
+from recipes.loaders import (
+    FAVORITE,
+    SHOPPING_CART,
+    load_own_recipe_flags,
+    user_membership,
+    with_feed_relations,
+)
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCartTotal,
+    ShoppingList,
+    SimilarRecipe,
+)
+from recipes.search import (
+    INGREDIENT_INDEX_VERSION_KEY,
+    get_version,
+    ingredient_index,
+    ingredient_trigram_index,
+    normalize,
+)
+from recipes.sync import (
+    Action,
+    Kind,
+    get_changes,
+    get_current_token,
+    is_token_expired,
+)
+from recipes.timeline import get_timeline_sources
 from recipes.serializers import (
     IngredientSerializer,
     RecipeCreateSerializer,
     RecipeListSerializer,
     RecipeCartSerializer,
+    RecipeImageSerializer,
     RecipeShortSerializer,
 )
+from recipes.pantry import pantry_index
 from recipes.permissions import IsAuthorOrReadOnly
+from recipes.renderers import (
+    ShoppingListCSVRenderer,
+    ShoppingListJSONRenderer,
+    ShoppingListTextRenderer,
+)
+
+
+def get_recipe_tags(recipe):
+    return [
+        recipe_tag(recipe["id"]),
+        user_tag(recipe["author"]["id"]),
+        *(ingredient_tag(ingredient["id"]) for ingredient in recipe["ingredients"]),
+    ]
+
+
+def get_recipe_list_tags(data):
+    tags = [RECIPES_TAG]
+    for recipe in data["results"] if isinstance(data, dict) else data:
+        tags.extend(get_recipe_tags(recipe))
+    return tags
+
+
+def get_ingredient_list_tags(data):
+    return [INGREDIENTS_TAG]
+
+
+INGREDIENT_QUERY_PARAMS = ("name", "contains", "fuzzy", "limit")
+
+
+def get_ingredient_list_validators(request, *args, **kwargs):
+    """ETag по номеру версии индекса ингредиентов, без запроса к каталогу."""
+    query = [
+        (param, normalize(request.query_params[param]))
+        for param in INGREDIENT_QUERY_PARAMS
+        if param in request.query_params
+    ]
+    return make_etag(get_version(INGREDIENT_INDEX_VERSION_KEY), query), None
+
+
+def get_recipe_validators(request, pk, *args, **kwargs):
+    """
+    Версия рецепта, его автора и флагов текущего пользователя одним
+    запросом. Last-Modified отдаётся только анонимам: у флагов
+    пользователя нет даты изменения.
+    """
+    user = request.user
+    fields = ["updated_at", "author__updated_at", "favorites_count"]
+    recipes = Recipe.objects.filter(pk=pk)
+    if user.is_authenticated:
+        recipes = recipes.annotate(
+            is_subscribed=Exists(
+                Subscription.objects.filter(
+                    subscriber=user, author=OuterRef("author_id")
+                )
+            )
+        )
+        fields.append("is_subscribed")
+    recipe = recipes.values(*fields).first()
+    if recipe is None:
+        return None
+
+    parts = [recipe[field] for field in fields]
+    if user.is_anonymous:
+        return make_etag(*parts), max(
+            recipe["updated_at"], recipe["author__updated_at"]
+        )
+    flags = user_membership.get(user.id)
+    parts += [pk in flags[FAVORITE], pk in flags[SHOPPING_CART]]
+    return make_etag(*parts), None
 
 
 class IngredientListView(generics.ListAPIView):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["name"]
     pagination_class = None
 
+    fuzzy_limit = 10
+    max_fuzzy_limit = 50
+
+    @conditional_response(get_ingredient_list_validators)
+    @cache_anonymous_response(get_ingredient_list_tags)
+    def list(self, request, *args, **kwargs):
+        fuzzy = request.query_params.get("fuzzy")
+        if fuzzy is not None:
+            return Response(
+                ingredient_trigram_index.search(fuzzy, limit=self.get_fuzzy_limit())
+            )
+        contains = request.query_params.get("contains")
+        if contains is not None:
+            return Response(ingredient_index.search(contains, substring=True))
+        name = request.query_params.get("name")
+        if name is None:
+            return Response(ingredient_index.all())
+        return Response(ingredient_index.search(name))
+
+    def get_fuzzy_limit(self):
+        limit = self.request.query_params.get("limit", "")
+        if not limit.isdigit() or int(limit) == 0:
+            return self.fuzzy_limit
+        return min(int(limit), self.max_fuzzy_limit)
+
 
 class IngredientDetailView(generics.RetrieveAPIView):
     queryset = Ingredient.objects.all()
@@ -39,35 +178,55 @@ class RecipeListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["author"]
+    pagination_class = RecipeKeysetPagination
 
     def get_serializer_class(self):
         if self.request.method == "POST":
             return RecipeCreateSerializer
         return RecipeListSerializer
 
+    @cache_anonymous_response(get_recipe_list_tags)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         recipe = serializer.save()
 
-        output_serializer = RecipeListSerializer(recipe, context={"request": request})
+        output_serializer = RecipeListSerializer(
+            recipe,
+            context={
+                "request": request,
+                "user_flags": load_own_recipe_flags(request.user, created=True),
+            },
+        )
         return Response(output_serializer.data, status=HTTPStatus.CREATED)
 
     def get_queryset(self):
-        queryset = Recipe.objects.all()
+        queryset = with_feed_relations(Recipe.objects.all())
         user = self.request.user
         params = self.request.query_params
 
         if user.is_authenticated:
             if params.get("is_favorited") in ["1", "true", "True"]:
-                queryset = queryset.filter(favorites__user=user)
+                queryset = queryset.filter(
+                    Exists(Favorite.objects.filter(user=user, recipe=OuterRef("pk")))
+                )
 
             if params.get("is_in_shopping_cart") in ["1", "true", "True"]:
-                queryset = queryset.filter(in_carts__user=user)
+                queryset = queryset.filter(
+                    Exists(
+                        ShoppingList.objects.filter(user=user, recipe=OuterRef("pk"))
+                    )
+                )
 
         if "author" in params:
             queryset = queryset.filter(author__id=params["author"])
 
+        if params.get("search"):
+            queryset = search_recipes(queryset, params["search"])
+
         return queryset
 
 
@@ -81,7 +240,7 @@ class RecipeGetLinkView(APIView):
 
 
 class RecipeDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Recipe.objects.all()
+    queryset = with_feed_relations(Recipe.objects.all())
     permission_classes = [IsAuthorOrReadOnly]
 
     def get_serializer_class(self):
@@ -89,6 +248,11 @@ class RecipeDetailView(generics.RetrieveUpdateDestroyAPIView):
             return RecipeCreateSerializer
         return RecipeListSerializer
 
+    @conditional_response(get_recipe_validators)
+    @cache_anonymous_response(get_recipe_tags)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def patch(self, request, *args, **kwargs):
         partial = True
         instance = self.get_object()
@@ -97,10 +261,34 @@ class RecipeDetailView(generics.RetrieveUpdateDestroyAPIView):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
 
-        read_serializer = RecipeListSerializer(instance, context={"request": request})
+        read_serializer = RecipeListSerializer(
+            instance,
+            context={
+                "request": request,
+                "user_flags": load_own_recipe_flags(request.user),
+            },
+        )
         return Response(read_serializer.data, status=HTTPStatus.OK)
 
 
+class RecipeImageView(APIView):
+    """Замена изображения рецепта файлом: multipart или само тело запроса."""
+
+    permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
+    parser_classes = [MultiPartParser, ImageUploadParser]
+    upload_field_name = "image"
+
+    def put(self, request, pk):
+        recipe = get_object_or_404(Recipe, pk=pk)
+        self.check_object_permissions(request, recipe)
+        serializer = RecipeImageSerializer(
+            recipe, data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+
 class ShoppingCartAddView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -108,13 +296,12 @@ class ShoppingCartAddView(APIView):
         user = request.user
         recipe = get_object_or_404(Recipe, pk=pk)
 
-        if user.shopping_cart.filter(recipe=recipe).exists():
+        _, created = user.shopping_cart.get_or_create(recipe=recipe)
+        if not created:
             return Response(
                 {"detail": "Рецепт уже в корзине."}, status=HTTPStatus.BAD_REQUEST
             )
 
-        user.shopping_cart.create(recipe=recipe)
-
         serializer = RecipeCartSerializer(recipe, context={"request": request})
         return Response(serializer.data, status=HTTPStatus.CREATED)
 
@@ -136,31 +323,135 @@ class ShoppingCartAddView(APIView):
 class DownloadShoppingCartView(APIView):
     permission_classes = [IsAuthenticated]
 
+    renderer_classes = [
+        ShoppingListTextRenderer,
+        ShoppingListCSVRenderer,
+        ShoppingListJSONRenderer,
+    ]
+    export_chunk_size = 500
+
     def get(self, request):
-        user = request.user
-        shopping_items = user.shopping_cart.all()
+        ingredients = (
+            ShoppingCartTotal.objects.filter(user=request.user)
+            .values(
+                "amount",
+                name=F("ingredient__name"),
+                unit=F("ingredient__measurement_unit"),
+            )
+            .order_by("name")
+        )
 
-        if not shopping_items.exists():
+        if not ingredients.exists():
             return Response({"detail": "Корзина пуста."}, status=HTTPStatus.BAD_REQUEST)
 
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__in=shopping_items.values_list("recipe", flat=True)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator(chunk_size=self.export_chunk_size)),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_cart.{renderer.format}"'
+        )
+        return response
+
+
+class RecipePantryView(APIView):
+    permission_classes = [permissions.AllowAny]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        ingredient_ids = self.get_ingredient_ids(request)
+        matches = pantry_index.match(
+            ingredient_ids,
+            limit=self.get_limit(request),
+            min_coverage=self.get_min_coverage(request),
+        )
+
+        recipes = Recipe.objects.in_bulk([recipe_id for recipe_id, _, _ in matches])
+        ingredients = Ingredient.objects.in_bulk(
+            set().union(*(missing for _, _, missing in matches))
+        )
+        context = {"request": request}
+        return Response(
+            [
+                {
+                    "recipe": RecipeShortSerializer(
+                        recipes[recipe_id], context=context
+                    ).data,
+                    "coverage": round(coverage, 3),
+                    "missing": IngredientSerializer(
+                        [
+                            ingredients[pk]
+                            for pk in sorted(missing)
+                            if pk in ingredients
+                        ],
+                        many=True,
+                    ).data,
+                }
+                for recipe_id, coverage, missing in matches
+                if recipe_id in recipes
+            ]
+        )
+
+    def get_ingredient_ids(self, request):
+        values = []
+        for value in request.query_params.getlist("ingredients"):
+            values.extend(part for part in value.split(",") if part)
+        if not values:
+            raise ValidationError({"ingredients": "Укажите id ингредиентов."})
+        if not all(value.isdigit() for value in values):
+            raise ValidationError(
+                {"ingredients": "id ингредиентов должны быть числами."}
             )
-            .values(name=F("component__name"), unit=F("component__measurement_unit"))
-            .annotate(amount=Sum("amount"))
-            .order_by("name")
+        return {int(value) for value in values}
+
+    def get_limit(self, request):
+        limit = request.query_params.get("limit", "")
+        if not limit.isdigit() or int(limit) == 0:
+            return self.default_limit
+        return min(int(limit), self.max_limit)
+
+    def get_min_coverage(self, request):
+        try:
+            return float(request.query_params.get("min_coverage", 0))
+        except ValueError:
+            raise ValidationError({"min_coverage": "Ожидается число от 0 до 1."})
+
+
+class SimilarRecipesView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        similar = SimilarRecipe.objects.filter(recipe_id=pk).select_related("similar")
+        if not similar and not Recipe.objects.filter(pk=pk).exists():
+            raise NotFound()
+        context = {"request": request}
+        return Response(
+            [
+                {
+                    **RecipeShortSerializer(item.similar, context=context).data,
+                    "score": round(item.score, 3),
+                }
+                for item in similar
+            ]
         )
 
-        lines = [
-            f"{item['name']} — {item['amount']} {item['unit']}" for item in ingredients
-        ]
 
-        content = "\n".join(lines)
+class TimelineView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        response = HttpResponse(content, content_type="text/plain")
-        response["Content-Disposition"] = 'attachment; filename="shopping_cart.txt"'
-        return response
+    def get(self, request):
+        paginator = TimelinePagination()
+        page = paginator.paginate_sources(get_timeline_sources(request.user), request)
+        recipe_ids = [row.recipe_id for row in page]
+        recipes = with_feed_relations(Recipe.objects.all()).in_bulk(recipe_ids)
+        serializer = RecipeListSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True,
+            context={"request": request},
+        )
+        return paginator.get_paginated_response(serializer.data)
 
 
 class FavoriteAddView(APIView):
@@ -170,14 +461,13 @@ class FavoriteAddView(APIView):
         user = request.user
         recipe = get_object_or_404(Recipe, pk=pk)
 
-        if user.favorites.filter(recipe=recipe).exists():
+        _, created = user.favorites.get_or_create(recipe=recipe)
+        if not created:
             return Response(
                 {"detail": "Рецепт уже в избранном."},
                 status=HTTPStatus.BAD_REQUEST,
             )
 
-        user.favorites.create(recipe=recipe)
-
         serializer = RecipeShortSerializer(recipe, context={"request": request})
         return Response(serializer.data, status=HTTPStatus.CREATED)
 
@@ -194,3 +484,56 @@ class FavoriteAddView(APIView):
 
         favorite.delete()
         return Response(status=HTTPStatus.NO_CONTENT)
+
+
+class SyncView(APIView):
+    """
+    Изменения рецептов, избранного, корзины и подписок после токена
+    ``since``. Без токена возвращает текущий токен: клиент получает его
+    до полной загрузки списков и дальше запрашивает только изменения.
+    Если изменения после токена уже удалены из журнала, отвечает 410
+    с новым токеном, и клиент загружает списки заново.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"token": str(get_current_token())})
+        if not since.isdigit():
+            raise ValidationError({"since": "Некорректный токен."})
+
+        if is_token_expired(int(since)):
+            return Response(
+                {
+                    "detail": "Токен устарел, нужна полная синхронизация.",
+                    "token": str(get_current_token()),
+                },
+                status=HTTPStatus.GONE,
+            )
+
+        changes, token, has_more = get_changes(request.user, int(since))
+        recipes = with_feed_relations(
+            Recipe.objects.filter(id__in=changes[Kind.RECIPE][Action.UPSERT])
+        )
+        data = {
+            "token": str(token),
+            "has_more": has_more,
+            "recipes": {
+                "upserted": RecipeListSerializer(
+                    recipes, many=True, context={"request": request}
+                ).data,
+                "deleted": changes[Kind.RECIPE][Action.DELETE],
+            },
+        }
+        for key, kind in (
+            ("favorites", Kind.FAVORITE),
+            ("shopping_cart", Kind.SHOPPING_CART),
+            ("subscriptions", Kind.SUBSCRIPTION),
+        ):
+            data[key] = {
+                "upserted": changes[kind][Action.UPSERT],
+                "deleted": changes[kind][Action.DELETE],
+            }
+        return Response(data)
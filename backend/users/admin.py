@@ -5,7 +5,16 @@ from .models import User, Subscription
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
-    list_display = ("id", "username", "email", "first_name", "last_name", "avatar")
+    list_display = (
+        "id",
+        "username",
+        "email",
+        "first_name",
+        "last_name",
+        "avatar",
+        "recipes_count",
+        "subscribers_count",
+    )
     search_fields = ("username", "email", "first_name", "last_name")
     ordering = ("id",)
     fieldsets = (
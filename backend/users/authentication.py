@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import LRUCache
+
+DEFAULTS = {
+    "LOCAL_SIZE": 10000,
+    "LOCAL_TTL": 30,
+    "SHARED_CACHE": None,
+    "TTL": 300,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "TOKEN_AUTH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class CachedUser(SimpleLazyObject):
+    """
+    Пользователь из кэша токенов: id и is_active известны без запроса
+    к БД, остальные поля загружаются при первом обращении.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, is_active):
+        super().__init__(lambda: get_user_model().objects.get(pk=user_id))
+        self.__dict__["_user_id"] = user_id
+        self.__dict__["_is_active"] = is_active
+
+    @property
+    def id(self):
+        return self.__dict__["_user_id"]
+
+    pk = id
+
+    @property
+    def is_active(self):
+        return self.__dict__["_is_active"]
+
+
+class TokenUserCache:
+    """
+    Кэш «токен → (id пользователя, is_active)» в памяти процесса и, при
+    настройке ``SHARED_CACHE``, в общем кэше Django. Отзыв токена удаляет
+    запись в этом процессе и в общем кэше, а в других процессах она живёт
+    не дольше ``LOCAL_TTL`` секунд: столько они ещё принимают токен.
+    """
+
+    key_prefix = "users:token-user:"
+
+    def __init__(self):
+        self._local = None
+
+    @property
+    def local(self):
+        if self._local is None:
+            self._local = LRUCache(get_setting("LOCAL_SIZE"), get_setting("LOCAL_TTL"))
+        return self._local
+
+    @property
+    def shared(self):
+        alias = get_setting("SHARED_CACHE")
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        cached = self.local.get(key)
+        if cached is None and self.shared is not None:
+            cached = self.shared.get(self.key_prefix + key)
+            if cached is not None:
+                self.local.set(key, cached)
+        return cached
+
+    def set(self, key, user):
+        cached = (user.pk, user.is_active)
+        self.local.set(key, cached)
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, cached, get_setting("TTL"))
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self.key_prefix + key)
+
+    def delete_user(self, user_id):
+        keys = list(Token.objects.filter(user_id=user_id).values_list("key", flat=True))
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete_many([self.key_prefix + key for key in keys])
+
+    def clear(self):
+        """Очищает записи этого процесса."""
+        self.local.clear()
+
+
+token_user_cache = TokenUserCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД для недавно виденных токенов."""
+
+    def authenticate_credentials(self, key):
+        cached = token_user_cache.get(key)
+        if cached is not None:
+            user_id, is_active = cached
+            if is_active:
+                user = CachedUser(user_id, is_active)
+                return (user, Token(key=key, user_id=user_id))
+
+        user, token = super().authenticate_credentials(key)
+        token_user_cache.set(key, user)
+        return (user, token)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["subscriber", "-id"], name="subscription_feed_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_subscription_feed_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="recipes_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Количество рецептов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="subscribers_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Количество подписчиков"
+            ),
+        ),
+    ]
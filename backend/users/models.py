@@ -1,8 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from foodgram.models import CounterFieldsMixin
+
+
+class User(CounterFieldsMixin, AbstractUser):
+    counter_fields = ("recipes_count", "subscribers_count")
 
-class User(AbstractUser):
     email = models.EmailField(
         "Email",
         max_length=254,
@@ -11,6 +15,16 @@ class User(AbstractUser):
     first_name = models.CharField("Имя", blank=False, max_length=150)
     last_name = models.CharField("Фамилия", blank=False, max_length=150)
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    avatar_variants = models.JSONField(
+        "Копии аватара", default=dict, blank=True, editable=False
+    )
+    recipes_count = models.IntegerField(
+        "Количество рецептов", default=0, editable=False
+    )
+    subscribers_count = models.IntegerField(
+        "Количество подписчиков", default=0, editable=False
+    )
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
@@ -48,6 +62,9 @@ class Subscription(models.Model):
                 name="unique_subscription",
             )
         ]
+        indexes = [
+            models.Index(fields=["subscriber", "-id"], name="subscription_feed_idx")
+        ]
 
     def __str__(self) -> str:
         return f"{self.subscriber} подписан на {self.author}"
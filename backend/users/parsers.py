@@ -0,0 +1,24 @@
+from rest_framework.parsers import DataAndFiles, FileUploadParser
+
+
+class ImageUploadParser(FileUploadParser):
+    """
+    Тело запроса — сам файл изображения (Content-Type: image/*). Файл
+    сохраняется обработчиками загрузки Django, большие — во временный
+    файл, и попадает в request.data под именем ``upload_field_name``
+    представления.
+    """
+
+    media_type = "image/*"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        files = super().parse(stream, media_type, parser_context).files
+        view = (parser_context or {}).get("view")
+        field_name = getattr(view, "upload_field_name", "file")
+        return DataAndFiles({}, {field_name: files["file"]})
+
+    def get_filename(self, stream, media_type, parser_context):
+        filename = super().get_filename(stream, media_type, parser_context)
+        if filename:
+            return filename
+        return "upload." + media_type.split(";")[0].split("/")[-1]
@@ -1,10 +1,19 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from django.core.files.base import ContentFile
+from django.core.files import File
 from rest_framework import serializers
 
+from foodgram.images import get_srcset
+from recipes.loaders import (
+    SUBSCRIPTION,
+    load_latest_recipes,
+    load_subscription_flags,
+)
 from recipes.models import Recipe
 from users.models import Subscription
 
@@ -12,15 +21,56 @@ User = get_user_model()
 
 
 class Base64ImageField(serializers.ImageField):
+    """
+    Изображение в виде data URI с base64 или загруженного файла.
+
+    Base64 декодируется частями во временный файл (небольшие изображения
+    остаются в памяти), без второй полной копии изображения.
+    """
+
+    chunk_size = 4 * 64 * 1024
+    default_error_messages = {"invalid_base64": "Некорректные данные base64."}
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
-            img_data = base64.b64decode(imgstr)
-            file_name = f"avatar.{ext}"
-            data = ContentFile(img_data, name=file_name)
+            data = self.decode(data)
         return super().to_internal_value(data)
 
+    def decode(self, data):
+        marker = data.find(";base64,")
+        if marker == -1:
+            self.fail("invalid_base64")
+        extension = data[len("data:image/") : marker]
+        buffer = SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        try:
+            for start in range(marker + len(";base64,"), len(data), self.chunk_size):
+                buffer.write(
+                    base64.b64decode(
+                        data[start : start + self.chunk_size], validate=True
+                    )
+                )
+        except (binascii.Error, ValueError):
+            buffer.close()
+            self.fail("invalid_base64")
+        buffer.seek(0)
+        return File(buffer, name=f"avatar.{extension}")
+
+
+class ImageSrcsetField(serializers.Field):
+    """Карта srcset уменьшенных копий изображения ``image_field``."""
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs.update(source="*", read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return get_srcset(
+            getattr(instance, self.image_field),
+            getattr(instance, f"{self.image_field}_variants"),
+            self.context.get("request"),
+        )
+
 
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
@@ -56,6 +106,9 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        user_flags = self.context.get("user_flags")
+        if user_flags is not None:
+            return obj.id in user_flags[SUBSCRIPTION]
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
@@ -116,16 +169,41 @@ class SetPasswordSerializer(serializers.Serializer):
 
 
 class SubscriptionRecipeSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField("image")
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_srcset", "cooking_time")
+
+
+def get_recipes_limit(context):
+    recipes_limit = context.get("recipes_limit")
+    if isinstance(recipes_limit, str):
+        return int(recipes_limit) if recipes_limit.isdigit() else None
+    return recipes_limit
+
+
+class SubscriptionAuthorListSerializer(serializers.ListSerializer):
+    """Загружает рецепты и флаги подписки сразу для всей страницы авторов."""
+
+    def to_representation(self, data):
+        authors = list(data.all() if hasattr(data, "all") else data)
+        request = self.context.get("request")
+        self.context["user_flags"] = load_subscription_flags(
+            request and request.user, authors
+        )
+        self.context["latest_recipes"] = load_latest_recipes(
+            authors, get_recipes_limit(self.context)
+        )
+        return super().to_representation(authors)
 
 
 class SubscriptionAuthorSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
+    avatar_srcset = ImageSrcsetField("avatar")
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -137,11 +215,16 @@ class SubscriptionAuthorSerializer(serializers.ModelSerializer):
             "email",
             "is_subscribed",
             "avatar",
+            "avatar_srcset",
             "recipes",
             "recipes_count",
         )
+        list_serializer_class = SubscriptionAuthorListSerializer
 
     def get_is_subscribed(self, obj):
+        user_flags = self.context.get("user_flags")
+        if user_flags is not None:
+            return obj.id in user_flags[SUBSCRIPTION]
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
@@ -157,26 +240,14 @@ class SubscriptionAuthorSerializer(serializers.ModelSerializer):
         return None
 
     def get_recipes(self, obj):
-        request = self.context.get("request")
-        recipes_limit = None
-        if request:
-            try:
-                recipes_limit = self.context.get("recipes_limit")
-            except (TypeError, ValueError):
-                pass
-
-        recipes = Recipe.objects.filter(author=obj).order_by("-id")
-        if recipes_limit is not None:
-            recipes = recipes[:recipes_limit]
-
+        latest_recipes = self.context.get("latest_recipes")
+        if latest_recipes is None:
+            latest_recipes = load_latest_recipes([obj], get_recipes_limit(self.context))
         serializer = SubscriptionRecipeSerializer(
-            recipes, many=True, context=self.context
+            latest_recipes[obj.id], many=True, context=self.context
         )
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
-
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     subscriber = UserSerializer(read_only=True)
@@ -4,9 +4,24 @@ import os
 
 from django.conf import settings
 from django.core.files import File
-from django.db.models.signals import post_migrate
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import purge_responses, user_tag
+from foodgram.images import is_variants_update, schedule_variants
+from recipes.counters import change_counter
+from recipes.media import release_references, remember_files, update_references
+from .authentication import token_user_cache
+from .models import Subscription
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -53,3 +68,54 @@ def load_test_users(sender, **kwargs):
 
         user.save()
         logger.info(f"Создан пользователь: {email} с аватаркой")
+
+
+@receiver(post_save, sender=Subscription)
+def count_created_subscription(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "subscribers_count", 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def count_deleted_subscription(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, "subscribers_count", -1)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """Смена пароля, деактивация и правка профиля сбрасывают кэш токенов."""
+    if is_variants_update(update_fields, "avatar_variants"):
+        return
+    transaction.on_commit(lambda: token_user_cache.delete_user(instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_user_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_user_responses(sender, instance, **kwargs):
+    purge_responses(user_tag(instance.id))
+
+
+@receiver(post_save, sender=User)
+def build_avatar_variants(sender, instance, **kwargs):
+    schedule_variants(instance, "avatar", "avatar_variants")
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_delete, sender=User)
+def remember_avatar_files(sender, instance, update_fields=None, **kwargs):
+    remember_files(instance, update_fields)
+
+
+@receiver(post_save, sender=User)
+def count_avatar_file_references(sender, instance, **kwargs):
+    update_references(instance)
+
+
+@receiver(post_delete, sender=User)
+def release_avatar_files(sender, instance, **kwargs):
+    release_references(instance)
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.tests.utils import create_user, get_client
+from users.authentication import (
+    CachedTokenAuthentication,
+    TokenUserCache,
+    token_user_cache,
+)
+
+SHARED = {"SHARED_CACHE": "default", "LOCAL_TTL": 30, "TTL": 300}
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        caches["default"].clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self):
+        return self.authentication.authenticate_credentials(self.token.key)
+
+    def test_repeated_lookup_skips_database(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual((user.pk, user.id, token.user_id), (self.user.pk,) * 3)
+        self.assertTrue(user.is_active)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_logout_revokes_token_at_once(self):
+        client = get_client(self.user)
+        self.assertEqual(client.get("/api/users/me/").status_code, 200)
+        self.assertEqual(client.post("/api/auth/token/logout/").status_code, 204)
+        self.assertEqual(client.get("/api/users/me/").status_code, 401)
+
+    def test_deactivation_drops_cached_token(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_entry_of_another_process_expires_after_local_ttl(self):
+        key = self.token.key
+        other_process = TokenUserCache()
+        other_process.set(key, self.user)
+        self.token.delete()
+        self.assertIsNotNone(other_process.get(key))
+        with mock.patch("foodgram.cache.time.monotonic", return_value=1e12):
+            self.assertIsNone(other_process.get(key))
+
+    @override_settings(TOKEN_AUTH_CACHE=SHARED)
+    def test_shared_cache_serves_other_processes(self):
+        self.authenticate()
+        other_process = TokenUserCache()
+        with self.assertNumQueries(0):
+            self.assertEqual(other_process.get(self.token.key), (self.user.pk, True))
+
+        key = self.token.key
+        self.token.delete()
+        self.assertIsNone(TokenUserCache().get(key))
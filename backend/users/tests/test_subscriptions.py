@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.tests.utils import create_recipe, create_user, get_client
+from users.authentication import token_user_cache
+from users.models import Subscription
+
+URL = "/api/users/subscriptions/"
+
+
+class SubscriptionRecipesTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = create_user()
+        self.client = get_client(self.user)
+        self.recipes = {}
+        for count in (0, 1, 4, 4):
+            author = create_user()
+            self.recipes[author.pk] = [create_recipe(author).pk for _ in range(count)][
+                ::-1
+            ]
+            Subscription.objects.create(subscriber=self.user, author=author)
+
+    def get_page(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(URL, {"limit": 10, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"], len(queries)
+
+    def test_latest_recipes_per_author(self):
+        results, _ = self.get_page(recipes_limit=2)
+        self.assertEqual(len(results), len(self.recipes))
+        for author in results:
+            expected = self.recipes[author["id"]]
+            self.assertEqual(
+                [recipe["id"] for recipe in author["recipes"]], expected[:2]
+            )
+            self.assertEqual(author["recipes_count"], len(expected))
+            self.assertTrue(author["is_subscribed"])
+
+    def test_without_limit_all_recipes_are_listed(self):
+        results, _ = self.get_page()
+        for author in results:
+            self.assertEqual(
+                [recipe["id"] for recipe in author["recipes"]],
+                self.recipes[author["id"]],
+            )
+
+    def test_query_count_does_not_depend_on_authors(self):
+        self.get_page(limit=1)
+        _, one = self.get_page(limit=1, recipes_limit=2)
+        _, all_authors = self.get_page(recipes_limit=2)
+        self.assertEqual(one, all_authors)
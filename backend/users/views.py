@@ -1,20 +1,31 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, F, OuterRef
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status, permissions, generics
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework import serializers
 
+from foodgram.cache import (
+    cache_anonymous_response,
+    conditional_response,
+    make_etag,
+    user_tag,
+)
+from foodgram.pagination import KeysetPagination
 from users.models import Subscription, User
+from users.parsers import ImageUploadParser
 from users.serializers import (
     UserSerializer,
     UserCreateSerializer,
     UserDetailSerializer,
     AvatarSerializer,
     SetPasswordSerializer,
-    SubscriptionAuthorSerializer, UserShortSerializer,
+    SubscriptionAuthorSerializer,
+    UserShortSerializer,
 )
 
 User = get_user_model()
@@ -41,9 +52,45 @@ class SubscriptionPagination(PageNumberPagination):
     max_page_size = 1000
 
 
+class SubscriptionKeysetPagination(KeysetPagination):
+    ordering = ("-subscription_id",)
+    fallback_class = SubscriptionPagination
+
+
+def get_subscribed_authors(user):
+    return User.objects.filter(subscribers__subscriber=user).annotate(
+        subscription_id=F("subscribers__id")
+    )
+
+
+def get_user_tags(data):
+    return [user_tag(data["id"])]
+
+
+def get_user_validators(request, pk=None, *args, **kwargs):
+    if not str(pk).isdigit():
+        return None
+    user = request.user
+    fields = ["updated_at"]
+    users = User.objects.filter(pk=pk)
+    if user.is_authenticated:
+        users = users.annotate(
+            is_subscribed=Exists(
+                Subscription.objects.filter(subscriber=user, author=OuterRef("pk"))
+            )
+        )
+        fields.append("is_subscribed")
+    author = users.values(*fields).first()
+    if author is None:
+        return None
+    etag = make_etag(*(author[field] for field in fields))
+    return etag, author["updated_at"] if user.is_anonymous else None
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
+    upload_field_name = "avatar"
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -61,6 +108,11 @@ class UserViewSet(viewsets.ModelViewSet):
             context["recipes_limit"] = None
         return context
 
+    @conditional_response(get_user_validators)
+    @cache_anonymous_response(get_user_tags)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -104,9 +156,8 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
-        user = request.user
-        queryset = User.objects.filter(subscribers__subscriber=user)
-        paginator = SubscriptionPagination()
+        queryset = get_subscribed_authors(request.user)
+        paginator = SubscriptionKeysetPagination()
         page = paginator.paginate_queryset(queryset, request)
         serializer = SubscriptionAuthorSerializer(
             page, many=True, context=self.get_serializer_context()
@@ -124,6 +175,7 @@ class UserViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=["put", "delete"],
         permission_classes=[IsAuthenticated],
+        parser_classes=[JSONParser, MultiPartParser, FormParser, ImageUploadParser],
         url_path="me/avatar",
     )
     def avatar(self, request):
@@ -158,10 +210,10 @@ class UserViewSet(viewsets.ModelViewSet):
 class SubscriptionView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = SubscriptionAuthorSerializer
-    pagination_class = SubscriptionPagination
+    pagination_class = SubscriptionKeysetPagination
 
     def get_queryset(self):
-        return User.objects.filter(subscribers__subscriber=self.request.user)
+        return get_subscribed_authors(self.request.user)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()